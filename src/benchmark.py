@@ -0,0 +1,462 @@
+"""
+Offline benchmarks. Run from the repository root:
+
+`python3.11 src/benchmark.py [name ...]` (runs every benchmark when no name is given)
+"""
+
+import os
+import random
+import subprocess
+import sys
+from math import isclose
+from pathlib import Path
+from shutil import rmtree
+from statistics import median
+from tempfile import mkdtemp
+from time import perf_counter
+from typing import Callable
+import numpy as np
+from PyQt5.QtCore import QEvent, QObject
+from PyQt5.QtGui import QFont, QImage, QPainter, QRegion
+from PyQt5.QtWidgets import QApplication, QWidget
+import bit_layout
+import config_cache
+import qutil
+from dial import Dial
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+NUM_FRAMES = 100000
+SEED = 0
+NUM_STARTUP_RUNS = 5
+NUM_STARTUP_IMPORTS = 10
+# per channel, for antialiasing differences between a widget and a pixmap
+DIAL_MODE_TOLERANCE = 2
+
+# boots `main` in a fresh interpreter up to the details being built, then prints the
+# boot timeline, one `mark name seconds` line per mark
+STARTUP_SCRIPT = """
+import main
+# imported on a thread after the boot, where it would interleave with the profile
+main.DEFERRED_IMPORTS = ()
+app = main.Application()
+app.primary_container.show()
+while main.BOOT_TIMELINE.elapsed("details") is None:
+    app.processEvents()
+for name, _ in main.BOOT_TIMELINE.marks:
+    print("mark", name, main.BOOT_TIMELINE.elapsed(name))
+"""
+
+q_app: QApplication | None = None
+
+
+def report(name: str, num_frames: int, elapsed: float) -> float:
+    rate = num_frames / elapsed
+    print(f"{name:<32} {num_frames:>8} frames {elapsed:>8.3f} s {rate:>12.0f} frames/s")
+    return rate
+
+
+def frame_mix(num_frames: int = NUM_FRAMES) -> list[tuple[int, bytearray]]:
+    """Reproducible mix of `(arbitration id, data)` frames as the dashboard sees them."""
+    import test_module  # pylint: disable=import-outside-toplevel
+
+    random.seed(SEED)
+    frames = []
+    for _ in range(num_frames):
+        msg = test_module.provide_random_message()
+        frames.append((msg.arbitration_id, msg.data))
+    return frames
+
+
+def dispatch_linear(frames: list[tuple[int, bytearray]], out: list) -> None:
+    """`parse_data` before the dispatch table, kept as the baseline: every frame
+    scans all the decoded ids. The extractors are the same, only the dispatch
+    differs."""
+    import can_decoder  # pylint: disable=import-outside-toplevel
+
+    entries = [
+        (msg_id, names, extract)
+        for msg_id, msg_entries in can_decoder.DISPATCH_TABLE.items()
+        for names, extract in msg_entries
+    ]
+    for msg_id, msg_data in frames:
+        for entry_id, names, extract in entries:
+            if entry_id == msg_id:
+                out.extend(zip(names, extract(msg_data)))
+
+
+def dispatch_table(frames: list[tuple[int, bytearray]], out: list) -> None:
+    import can_decoder  # pylint: disable=import-outside-toplevel
+
+    table = can_decoder.DISPATCH_TABLE
+    for msg_id, msg_data in frames:
+        for names, extract in table.get(msg_id, ()):
+            out.extend(zip(names, extract(msg_data)))
+
+
+def bench_dispatch() -> None:
+    frames = frame_mix()
+    results = {}
+
+    for name, f in (
+        ("linear scan", dispatch_linear),
+        ("dispatch table", dispatch_table),
+    ):
+        out = []
+        start = perf_counter()
+        f(frames, out)
+        results[name] = (report(name, len(frames), perf_counter() - start), out)
+
+    (before, before_out), (after, after_out) = results.values()
+    assert before_out == after_out, "dispatch table decoded different values"
+    print(f"speedup: {after / before:.2f}x")
+
+
+def decode_generic(frames: list[tuple[int, bytearray]], out: list) -> None:
+    """Every frame through `cantools`, the decode path before compiling the DBC."""
+    decode_message = config_cache.load_dbc().decode_message
+    for msg_id, msg_data in frames:
+        out.extend(decode_message(msg_id, msg_data).items())
+
+
+def check_pre_dbc_values(extractors: dict[int, tuple]) -> None:
+    """Values of the compiled extractors against the hand-written parsers the DBC
+    replaced. The gear is the choice name "N" where the parsers returned 0, and the
+    odometer and fuel level are scaled by multiplying, so they can differ in the
+    last float digits."""
+    db = config_cache.load_dbc()
+
+    def decode(message: str, data: bytes) -> dict:
+        names, extract = extractors[db.get_message_by_name(message).frame_id]
+        return dict(zip(names, extract(bytearray(data))))
+
+    for raw in range(16):
+        gear = decode("engine_speed", bytes([0, 0, 0, 0, 0, 0, raw, 0]))["gear"]
+        expected = "N" if raw in (0, 7) else raw
+        assert gear == expected, f"gear {raw} decoded to {gear!r}"
+
+    for raw in range(1 << 12):
+        data = raw.to_bytes(8, "little")
+        fuel_level = decode("combination_meter", data)["fuel_level"]
+        expected = (1 - (raw - 0x25) / (0x3FF - 0x25)) * 100
+        assert isclose(fuel_level, expected, abs_tol=1e-9), f"fuel level {raw}"
+
+    for raw in (*range(0, 1 << 32, 4294967), 1, 3, 0xFFFFFFFF):
+        odometer = decode("odometer", raw.to_bytes(8, "little"))["odometer"]
+        assert isclose(odometer, raw / 10, rel_tol=1e-12), f"odometer {raw}"
+
+
+def bench_dbc() -> None:
+    extractors = {}
+    for db_msg in config_cache.load_dbc().messages:
+        layouts = bit_layout.message_layouts(db_msg, {})
+        extractors[db_msg.frame_id] = (
+            tuple(layouts),
+            bit_layout.compile_extractor(db_msg.frame_id, layouts),
+        )
+    check_pre_dbc_values(extractors)
+
+    random.seed(SEED)
+    msg_ids = list(extractors)
+    frames = [
+        (msg_ids[i % len(msg_ids)], bytearray(random.randbytes(8)))
+        for i in range(NUM_FRAMES)
+    ]
+
+    def decode_compiled(frames: list[tuple[int, bytearray]], out: list) -> None:
+        for msg_id, msg_data in frames:
+            names, extract = extractors[msg_id]
+            out.extend(zip(names, extract(msg_data)))
+
+    results = {}
+    for name, f in (
+        ("cantools decode_message", decode_generic),
+        ("compiled extractors", decode_compiled),
+    ):
+        out = []
+        start = perf_counter()
+        f(frames, out)
+        results[name] = (report(name, len(frames), perf_counter() - start), out)
+
+    (before, before_out), (after, after_out) = results.values()
+    assert before_out == after_out, "compiled extractors decoded different values"
+    print(f"speedup: {after / before:.2f}x")
+
+
+def qt_app() -> QApplication:
+    global q_app  # pylint: disable=global-statement
+    if q_app is None:
+        q_app = QApplication([])
+    return q_app
+
+
+def bench_icons() -> None:
+    app = qt_app()
+    import main as dashboard  # pylint: disable=import-outside-toplevel
+
+    color = dashboard.SYMBOL_YELLOW_COLOR
+    paths = [
+        f"{dashboard.IMAGE_PATH}/{x}" for x in sorted(os.listdir(dashboard.IMAGE_PATH))
+    ]
+    images = [QImage(x) for x in paths]
+    recolor_funcs = (
+        ("per pixel", qutil.change_image_color_per_pixel),
+        ("bulk", qutil.change_image_color),
+    )
+    results = {}
+
+    for name, f in recolor_funcs:
+        tinted = [x.copy() for x in images]
+        start = perf_counter()
+        for image in tinted:
+            f(image, color)
+        elapsed = perf_counter() - start
+        results[name] = tinted
+        print(f"{name + ' recolor':<32} {len(tinted):>8} images {elapsed:>8.3f} s")
+
+    for path, before, after in zip(paths, *results.values()):
+        assert before == after, f"bulk recolor differs from per pixel recolor: {path}"
+
+    ui = dashboard.UI()
+    # the warning lights are built on first show, the rest of the icons with the
+    # details after the first frame
+    ui.build_details()
+    for image in ui.lazy_images:
+        image.build()
+    icons = ui.findChildren(qutil.Image)
+    qutil.ICON_CACHE_PATH = Path(mkdtemp())
+    icon_loads = (
+        ("per pixel startup icons", qutil.change_image_color_per_pixel, True),
+        ("bulk startup icons", qutil.change_image_color, True),
+        ("disk cached startup icons", qutil.change_image_color, False),
+        ("memory cached startup icons", qutil.change_image_color, False),
+    )
+
+    for name, f, cold in icon_loads:
+        qutil.change_image_color = f
+        if cold:
+            rmtree(qutil.ICON_CACHE_PATH, ignore_errors=True)
+        if name != "memory cached startup icons":
+            qutil.render_icon.cache_clear()
+
+        start = perf_counter()
+        for icon in icons:
+            icon.update()
+        print(f"{name:<32} {len(icons):>8} icons  {perf_counter() - start:>8.3f} s")
+
+    rmtree(qutil.ICON_CACHE_PATH, ignore_errors=True)
+    app.processEvents()
+
+
+class PaintAreaCounter(QObject):
+    """Sums the area of every paint event region of the watched widgets, and keeps
+    the regions."""
+
+    def __init__(self, widgets: list[QWidget]) -> None:
+        super().__init__()
+        self.area = 0
+        self.regions: list[QRegion] = []
+        for widget in widgets:
+            widget.installEventFilter(self)
+
+    def eventFilter(self, a0: QObject, a1: QEvent) -> bool:
+        if a1.type() == QEvent.Type.Paint:
+            self.area += sum(x.width() * x.height() for x in a1.region().rects())
+            self.regions.append(QRegion(a1.region()))
+        return False
+
+
+def dial_pixels(image: QImage) -> np.ndarray:
+    image = image.convertToFormat(QImage.Format.Format_ARGB32)
+    pixels = np.frombuffer(image.constBits().asstring(image.sizeInBytes()), np.uint8)
+    return pixels.reshape(image.height(), -1).astype(np.int16)
+
+
+def check_dial_modes() -> None:
+    """Single widget dials look like widget dials at values around the redline and
+    the ends, both painted whole and after the partial updates of a value sweep."""
+    app = qt_app()
+    import main as dashboard  # pylint: disable=import-outside-toplevel
+
+    dials = {
+        "tachometer": (
+            dashboard.tachomenter_dial_config,
+            dashboard.DIAL_PARAMS_MAJOR,
+            QFont(dashboard.FONT_GROUP, 20),
+        ),
+        "speedometer": (
+            dashboard.speedometer_dial_config,
+            dashboard.DIAL_PARAMS_MAJOR,
+            QFont(dashboard.FONT_GROUP, 18),
+        ),
+        "coolant": (
+            dashboard.coolant_temp_dial_config,
+            dashboard.DIAL_PARAMS_MINOR,
+            QFont(),
+        ),
+        "fuel": (
+            dashboard.fuel_level_dial_config,
+            dashboard.DIAL_PARAMS_MINOR,
+            QFont(),
+        ),
+    }
+    for name, (config, params, font) in dials.items():
+        widget_dial, single_dial = (
+            Dial(
+                None,
+                label_font=font,
+                single_widget=single_widget,
+                **config.__dict__,
+                **params,
+                **dashboard.ALL_DIAL_PARAMS,
+            )
+            for single_widget in (False, True)
+        )
+        for dial in (widget_dial, single_dial):
+            dial.show()
+        app.processEvents()
+
+        # what is on screen, kept up to date with the regions the dial repaints
+        screen = single_dial.grab().toImage()
+        painted = PaintAreaCounter([single_dial])
+        unit_range = config.max_unit - config.min_unit
+        values = [config.min_unit + unit_range * x for x in (0.3, 0.95, 0.6, 1, 0)]
+        values += [config.redline - unit_range / 100, config.redline, config.max_unit]
+        for value in values:
+            painted.regions.clear()
+            widget_dial.dial_unit = value
+            single_dial.dial_unit = value
+            app.processEvents()
+            regions = painted.regions.copy()
+            whole = single_dial.grab().toImage()
+            painter = QPainter(screen)
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+            for region in regions:
+                painter.setClipRegion(region)
+                painter.drawImage(0, 0, whole)
+            painter.end()
+
+            expected = dial_pixels(widget_dial.grab().toImage())
+            for mode, image in (("painted whole", whole), ("updated", screen)):
+                difference = np.abs(dial_pixels(image) - expected).max()
+                assert difference <= DIAL_MODE_TOLERANCE, (
+                    f"{name} single widget dial {mode} at {value}"
+                    f" differs from the widget dial by up to {difference}"
+                )
+
+        for dial in (widget_dial, single_dial):
+            dial.close()
+    print(f"single widget dials match widget dials for {', '.join(dials)}")
+
+
+def bench_dial() -> None:
+    check_dial_modes()
+    app = qt_app()
+    import main as dashboard  # pylint: disable=import-outside-toplevel
+
+    num_frames = 300
+    config = dashboard.tachomenter_dial_config
+
+    for name, single_widget in (("widget dial", False), ("single widget dial", True)):
+        start = perf_counter()
+        dial = Dial(
+            None,
+            label_font=QFont(dashboard.FONT_GROUP, 20),
+            single_widget=single_widget,
+            **config.__dict__,
+            **dashboard.DIAL_PARAMS_MAJOR,
+            **dashboard.ALL_DIAL_PARAMS,
+        )
+        dial.show()
+        app.processEvents()
+        build_time = perf_counter() - start
+
+        def sweep() -> None:
+            for i in range(num_frames):
+                dial.dial_unit = config.max_unit * i / num_frames
+                app.processEvents()
+
+        start = perf_counter()
+        sweep()
+        elapsed = perf_counter() - start
+        # counted in a second sweep, summing the regions in Python takes longer than
+        # painting some of them
+        dial.dial_unit = 0
+        app.processEvents()
+        widgets = dial.findChildren(QWidget)
+        paint_area = PaintAreaCounter([dial, *widgets])
+        sweep()
+
+        print(
+            f"{name:<20} {len(widgets):>4} child widgets"
+            f"  build {build_time * 1000:>7.1f} ms"
+            f"  {num_frames / elapsed:>8.0f} frames/s"
+            f"  {paint_area.area / num_frames:>9.0f} painted px/frame"
+        )
+        dial.close()
+
+
+def startup_run() -> tuple[dict[str, float], dict[str, float]]:
+    """Boot timeline marks and the cumulative import time of each module imported
+    by `main`, both in seconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+        capture_output=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": str(Path(__file__).parent)},
+        text=True,
+    )
+    marks = {}
+    for line in result.stdout.splitlines():
+        if line.startswith("mark "):
+            name, elapsed = line[5:].rsplit(" ", 1)
+            marks[name] = float(elapsed)
+
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        # modules imported by `main` itself are indented by two spaces, after the
+        # space following the separator
+        if name.startswith("   ") and not name.startswith("    "):
+            imports[name.strip()] = int(cumulative) / 1e6
+    return marks, imports
+
+
+def bench_startup() -> None:
+    """Median boot timeline and import profile of `NUM_STARTUP_RUNS` boots, after one
+    boot that fills the config and icon caches."""
+    startup_run()
+    runs = [startup_run() for _ in range(NUM_STARTUP_RUNS)]
+
+    for name in runs[0][0]:
+        elapsed = median(x[name] for x, _ in runs)
+        print(f"{name:<32} {elapsed * 1000:>8.1f} ms")
+
+    print(f"slowest imports of main (cumulative, median of {NUM_STARTUP_RUNS} runs):")
+    imports = {name: median(x.get(name, 0) for _, x in runs) for name in runs[0][1]}
+    for name, elapsed in sorted(imports.items(), key=lambda x: -x[1])[
+        :NUM_STARTUP_IMPORTS
+    ]:
+        print(f"  {name:<30} {elapsed * 1000:>8.1f} ms")
+
+
+BENCHMARKS: dict[str, Callable[[], None]] = {
+    "dispatch": bench_dispatch,
+    "dbc": bench_dbc,
+    "icons": bench_icons,
+    "dial": bench_dial,
+    "startup": bench_startup,
+}
+
+
+def main() -> None:
+    names = sys.argv[1:] or list(BENCHMARKS.keys())
+    for name in names:
+        print(f"[{name}]")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Compiles DBC messages into fused extractors, one generated function per message that
+returns the value of every signal from shifts and masks instead of going through
+`cantools` on each frame. Fields within one byte are read from that byte, the others
+from the payload read once as an integer.
+
+Values match `Message.decode(data)`: `scale * raw + offset`, or the choice name where
+the DBC defines one. One bit signals without scaling or choices decode to `bool`, and
+signal groups from `config/can.toml` decode to an int bitmask with bit i set when
+member i is set, so no list is allocated per frame.
+`python3.11 src/bit_layout.py` prints the generated source.
+"""
+
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    # compiled layouts are cached by `config_cache`, so the boot path never loads it
+    import cantools
+
+LAYOUT_KEYS = {"byte", "bit", "width", "signed", "scale", "offset", "choices", "flags"}
+
+
+def signal_layout(signal: "cantools.db.Signal") -> Optional[dict[str, Any]]:
+    """The layout of a DBC signal, or `None` if it is not a little-endian integer."""
+    if signal.byte_order != "little_endian" or signal.is_float:
+        return None
+
+    layout: dict[str, Any] = {
+        "byte": signal.start // 8,
+        "bit": signal.start % 8,
+        "width": signal.length,
+    }
+    if signal.is_signed:
+        layout["signed"] = True
+    if signal.scale != 1 or isinstance(signal.scale, float):
+        layout["scale"] = signal.scale
+    if signal.offset != 0 or isinstance(signal.offset, float):
+        layout["offset"] = signal.offset
+    if signal.choices:
+        layout["choices"] = {k: str(v) for k, v in signal.choices.items()}
+    return layout
+
+
+def message_layouts(
+    db_msg: "cantools.db.Message", groups: dict[str, list[str]]
+) -> Optional[dict[str, dict[str, Any]]]:
+    """Layouts of every signal of `db_msg`, with the members of each group in `groups`
+    replaced by one `flags` layout. `None` if a signal cannot be compiled."""
+    if db_msg.is_multiplexed():
+        return None
+
+    layouts = {}
+    for signal in db_msg.signals:
+        layout = signal_layout(signal)
+        if layout is None:
+            return None
+        layouts[signal.name] = layout
+
+    for group, members in groups.items():
+        if not any(x in layouts for x in members):
+            continue
+
+        flags = []
+        for member in members:
+            layout = layouts.get(member)
+            if (
+                layout is None
+                or layout.keys() != {"byte", "bit", "width"}
+                or layout["width"] != 1
+            ):
+                raise ValueError(f"{member} of {group} is not a one bit signal")
+            flags.append([layout["byte"], layout["bit"]])
+
+        grouped = {}
+        for name, layout in layouts.items():
+            if name == members[0]:
+                grouped[group] = {"flags": flags}
+            elif name not in members:
+                grouped[name] = layout
+        layouts = grouped
+
+    return layouts
+
+
+def bit_field(position: int, width: int) -> str:
+    """Reads a field from its byte when it fits in one, avoiding the (allocating)
+    arithmetic on the whole payload, which covers every other field."""
+    byte, bit = divmod(position, 8)
+    if bit + width <= 8:
+        expression = f"data[{byte}]"
+        if bit:
+            expression = f"{expression} >> {bit}"
+        if bit + width < 8:
+            expression = f"{expression} & {(1 << width) - 1:#x}"
+        return expression
+
+    if position:
+        return f"payload >> {position} & {(1 << width) - 1:#x}"
+    return f"payload & {(1 << width) - 1:#x}"
+
+
+def bit_test(byte: int, bit: int) -> str:
+    return f"data[{byte}] & {1 << bit:#x} != 0"
+
+
+def flags_expression(flags: list[list[int]]) -> str:
+    """An int with bit i set when flag i is set. Runs of adjacent flags are moved
+    with one shift and mask."""
+    positions = [byte * 8 + bit for byte, bit in flags]
+    terms = []
+    start = 0
+
+    for i in range(1, len(positions) + 1):
+        if i < len(positions) and positions[i] == positions[i - 1] + 1:
+            continue
+
+        term = bit_field(positions[start], i - start)
+        if start:
+            term = f"({term}) << {start}"
+        terms.append(term)
+        start = i
+
+    return " | ".join(f"({x})" if len(terms) > 1 else x for x in terms)
+
+
+def field_expression(name: str, layout: dict[str, Any]) -> str:
+    if unknown := layout.keys() - LAYOUT_KEYS:
+        raise ValueError(f"Unknown layout keys for {name}: {', '.join(unknown)}")
+
+    if "flags" in layout:
+        return flags_expression(layout["flags"])
+
+    position = layout["byte"] * 8 + layout.get("bit", 0)
+    width = layout.get("width", 1)
+
+    if width == 1 and layout.keys() <= {"byte", "bit", "width"}:
+        return bit_test(layout["byte"], layout.get("bit", 0))
+
+    expression = bit_field(position, width)
+    if layout.get("signed"):
+        sign_bit = 1 << (width - 1)
+        expression = f"(({expression}) ^ {sign_bit:#x}) - {sign_bit:#x}"
+
+    raw = expression
+    if layout.keys().isdisjoint({"scale", "offset", "choices"}):
+        return raw
+
+    value = "raw" if "choices" in layout else raw
+    if " " in value:
+        value = f"({value})"
+    if "scale" in layout:
+        value = f"{layout['scale']!r} * {value}"
+    if "offset" in layout:
+        sign = "-" if layout["offset"] < 0 else "+"
+        value = f"{value} {sign} {abs(layout['offset'])!r}"
+
+    if "choices" in layout:
+        return f"choices_{name}.get(raw := {raw}, {value})"
+    return value
+
+
+def extractor_name(frame_id: int) -> str:
+    return f"extract_{frame_id:#05x}"
+
+
+def extractor_source(frame_id: int, layouts: dict[str, dict[str, Any]]) -> str:
+    fields = [
+        f"        {field_expression(name, layout)},  # {name}"
+        for name, layout in layouts.items()
+    ]
+    lines = [f"def {extractor_name(frame_id)}(data):"]
+    if any("payload" in x for x in fields):
+        lines.append('    payload = from_bytes(data, "little")')
+    lines += ["    return (", *fields, "    )"]
+    return "\n".join(lines) + "\n"
+
+
+def compile_extractor(
+    frame_id: int, layouts: dict[str, dict[str, Any]]
+) -> Callable[[bytearray], tuple]:
+    """Returns a function mapping a payload to the values of `layouts`, in order."""
+    namespace: dict[str, Any] = {"from_bytes": int.from_bytes}
+    for name, layout in layouts.items():
+        if "choices" in layout:
+            namespace[f"choices_{name}"] = layout["choices"]
+
+    source = extractor_source(frame_id, layouts)
+    exec(  # pylint: disable=exec-used
+        compile(source, f"<dbc message {frame_id:#05x}>", "exec"), namespace
+    )
+    return namespace[extractor_name(frame_id)]
+
+
+if __name__ == "__main__":
+    import can_decoder
+    import config_cache
+
+    for message in config_cache.load_dbc().messages:
+        message_layout = message_layouts(message, can_decoder.SIGNAL_GROUPS)
+        if message_layout is None:
+            print(f"# {message.name} is decoded by cantools\n")
+        else:
+            print(extractor_source(message.frame_id, message_layout))
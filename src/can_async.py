@@ -0,0 +1,121 @@
+"""
+Reads CAN messages through `can.AsyncBufferedReader` on an asyncio loop in its own
+thread, as an alternative to `CanHandler`'s per message notifier callback. Every
+wakeup drains the whole buffer and decodes it as one batch, and the OBD conversation
+runs as a coroutine woken by ECU responses.
+"""
+
+import asyncio
+from concurrent.futures import CancelledError
+from threading import Thread
+from time import time
+from typing import Any, Callable, Optional
+import can
+from can_decoder import ECU_RESPONSE_ID
+from pid_scheduler import PidScheduler
+
+STOP_TIMEOUT_S = 2
+
+
+class AsyncCanReader:
+    """
+    Calls `listener` for every message and `end_batch` after each batch. With a
+    `scheduler`, sends its requests whenever an ECU response arrives or its next PID
+    is due.
+    """
+
+    def __init__(
+        self,
+        bus: can.BusABC,
+        listener: Callable[[can.message.Message], Any],
+        end_batch: Optional[Callable[[], Any]] = None,
+        scheduler: Optional[PidScheduler] = None,
+    ) -> None:
+        self.bus = bus
+        self.listener = listener
+        self.end_batch = end_batch
+        self.scheduler = scheduler
+        self.responded = asyncio.Event()
+
+        self.loop = asyncio.new_event_loop()
+        self.reader = can.AsyncBufferedReader()
+        # created before the loop runs, so the notifier can register its file
+        # descriptor (or reader thread) without racing the loop thread
+        self.notifier = can.notifier.Notifier(bus, [self.reader], loop=self.loop)
+        self.thread = Thread(target=self.loop.run_forever, daemon=True)
+        self.task: Optional[Any] = None
+
+        self.num_messages = 0
+        self.num_batches = 0
+        self.max_batch = 0
+
+    def start(self) -> None:
+        self.thread.start()
+        self.task = asyncio.run_coroutine_threadsafe(self.run(), self.loop)
+
+    def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                self.task.result(STOP_TIMEOUT_S)
+            except CancelledError:
+                pass
+
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(STOP_TIMEOUT_S)
+        self.notifier.stop()
+        self.loop.close()
+
+    async def run(self) -> None:
+        conversation = None
+        if self.scheduler is not None:
+            conversation = asyncio.create_task(self.run_conversation())
+
+        buffer = self.reader.buffer
+        try:
+            while True:
+                batch = [await buffer.get()]
+                while not buffer.empty():
+                    batch.append(buffer.get_nowait())
+                self.parse_batch(batch)
+        finally:
+            if conversation is not None:
+                conversation.cancel()
+
+    def parse_batch(self, batch: list[can.message.Message]) -> None:
+        listener = self.listener
+        for msg in batch:
+            listener(msg)
+            if msg.arbitration_id == ECU_RESPONSE_ID:
+                self.responded.set()
+        if self.end_batch:
+            self.end_batch()
+
+        self.num_messages += len(batch)
+        self.num_batches += 1
+        self.max_batch = max(self.max_batch, len(batch))
+
+    async def run_conversation(self) -> None:
+        scheduler = self.scheduler
+        responded = self.responded
+
+        while True:
+            now = time()
+            while (message := scheduler.next_request(now)) is not None:
+                self.bus.send(message)
+
+            responded.clear()
+            try:
+                await asyncio.wait_for(
+                    responded.wait(), scheduler.seconds_until_next(now)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def report(self) -> str:
+        batches = max(self.num_batches, 1)
+        return (
+            f"[Info] asyncio reader: {self.num_messages} messages in"
+            f" {self.num_batches} batches (avg {self.num_messages / batches:.1f},"
+            f" max {self.max_batch})"
+        )
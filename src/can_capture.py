@@ -0,0 +1,140 @@
+"""
+Binary CAN captures: fixed-size records appended by `CanRecorder` and replayed from a
+memory map by `CanReplayer`.
+"""
+
+import mmap
+import struct
+from pathlib import Path
+from threading import Event, Thread
+from time import perf_counter, sleep, strftime
+from typing import Iterator
+import can
+
+CAPTURE_PATH = Path("local/captures")
+CAPTURE_SUFFIX = ".wrxcap"
+CAPTURE_MAGIC = b"WRXCAP01"
+
+# timestamp, arbitration id, dlc, data
+RECORD = struct.Struct("<dIB8s")
+ID_EXTENDED_FLAG = 0x80000000
+
+
+def new_capture_path() -> Path:
+    return CAPTURE_PATH.joinpath(strftime("%Y%m%d-%H%M%S")).with_suffix(CAPTURE_SUFFIX)
+
+
+def latest_capture_path() -> Path | None:
+    captures = sorted(CAPTURE_PATH.glob(f"*{CAPTURE_SUFFIX}"))
+    return captures[-1] if captures else None
+
+
+class CanRecorder(can.Listener):
+    """Appends every received message to a capture file. Attach to a `can.Notifier`."""
+
+    def __init__(self, path: Path | str) -> None:
+        super().__init__()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(path, "ab")  # pylint: disable=consider-using-with
+        if self.file.tell() == 0:
+            self.file.write(CAPTURE_MAGIC)
+        self.num_records = 0
+
+    def on_message_received(self, msg: can.message.Message) -> None:
+        arbitration_id = msg.arbitration_id
+        if msg.is_extended_id:
+            arbitration_id |= ID_EXTENDED_FLAG
+
+        self.file.write(
+            RECORD.pack(msg.timestamp, arbitration_id, msg.dlc, bytes(msg.data))
+        )
+        self.num_records += 1
+
+    def stop(self) -> None:
+        if not self.file.closed:
+            self.file.close()
+
+
+def read_records(path: Path | str) -> Iterator[tuple[float, int, int, bytes]]:
+    """Yields `(timestamp, arbitration id, dlc, data)` straight from a memory map of
+    the capture. A partially written last record is ignored."""
+    with open(path, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as capture:
+        if capture[: len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+            raise ValueError(f"{path} is not a CAN capture")
+
+        num_records = (len(capture) - len(CAPTURE_MAGIC)) // RECORD.size
+        end = len(CAPTURE_MAGIC) + num_records * RECORD.size
+        for offset in range(len(CAPTURE_MAGIC), end, RECORD.size):
+            yield RECORD.unpack_from(capture, offset)
+
+
+def read_messages(path: Path | str) -> Iterator[can.message.Message]:
+    for timestamp, arbitration_id, dlc, data in read_records(path):
+        yield can.message.Message(
+            timestamp=timestamp,
+            arbitration_id=arbitration_id & ~ID_EXTENDED_FLAG,
+            is_extended_id=bool(arbitration_id & ID_EXTENDED_FLAG),
+            dlc=dlc,
+            data=data[:dlc],
+        )
+
+
+class CanReplayer:
+    """
+    Sends a capture to a bus from a background thread, keeping the recorded timing.
+
+    `speed` scales playback: 1 is real time, N is N times faster and 0 sends as fast
+    as possible. With `loop` the capture restarts when it ends.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        bus: can.BusABC,
+        speed: float = 1,
+        loop: bool = False,
+    ) -> None:
+        self.path = path
+        self.bus = bus
+        self.speed = speed
+        self.loop = loop
+        self.num_sent = 0
+        self.stopped = Event()
+        self.thread = Thread(target=self.run, daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            self.replay_once()
+            if not self.loop:
+                break
+
+    def replay_once(self) -> None:
+        start_time = perf_counter()
+        first_timestamp = None
+
+        for msg in read_messages(self.path):
+            if self.stopped.is_set():
+                return
+
+            if self.speed > 0:
+                if first_timestamp is None:
+                    first_timestamp = msg.timestamp
+                wait = (msg.timestamp - first_timestamp) / self.speed - (
+                    perf_counter() - start_time
+                )
+                if wait > 0:
+                    sleep(wait)
+
+            self.bus.send(msg)
+            self.num_sent += 1
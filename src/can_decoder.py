@@ -0,0 +1,300 @@
+"""
+CAN definitions and the Qt-free decoding half of `CanHandler`, usable headless.
+"""
+
+from collections import Counter
+from inspect import getmembers, isfunction
+from pathlib import Path
+from typing import Any, Callable, Optional
+import can
+from data import CarData
+from bit_layout import compile_extractor
+from iso_tp import FLOW_CONTROL_DATA, IsoTpReceiver
+from can_filter import STANDARD_ID_BITS, filter_description
+from smoothing import SignalFilter
+import config_cache
+import can_data_parser
+
+parsers = {x[0]: x[1] for x in getmembers(can_data_parser, isfunction)}
+
+
+COMPILED_CONFIG = config_cache.load()
+CONFIG: dict[str, Any] = COMPILED_CONFIG["can"]
+CAN_IDS: dict[str, int] = CONFIG["can_ids"]
+CONVERSATION_IDS: dict[str, int] = CONFIG["conversation_ids"]
+CURRENT_DATA_DEFINITIONS: dict[str, dict[str, int]] = CONFIG[
+    "current_data_mode_definitions"
+]
+MODE_IDS: dict[str, int] = CONFIG["mode_ids"]
+CONVERSATION_SETTINGS: dict[str, int] = CONFIG.get("conversation", {})
+SIGNAL_FILTERS: dict[str, dict[str, float]] = CONFIG.get("signal_filters", {})
+SIGNAL_GROUPS: dict[str, list[str]] = CONFIG.get("signal_groups", {})
+
+
+MODE_OFFSET = 0x40
+
+CAN_ID_ITEMS = CAN_IDS.items()
+CAN_ID_VALUES = CAN_IDS.values()
+CURRENT_DATA_DEFINITION_KEYS = list(CURRENT_DATA_DEFINITIONS.keys())
+CURRENT_DATA_DEFINITION_ITEMS = CURRENT_DATA_DEFINITIONS.items()
+# pid -> (name, response length)
+PID_DEFINITIONS = {
+    v["pid"]: (k, v["response_length"]) for k, v in CURRENT_DATA_DEFINITION_ITEMS
+}
+
+NUM_DEFINITIONS = len(CURRENT_DATA_DEFINITIONS)
+
+# frames the kernel received on a socketcan interface, counted before any CAN filter
+INTERFACE_RX_PACKETS_PATH = "/sys/class/net/{}/statistics/rx_packets"
+
+
+def dbc_message_parser(db_msg: Any, names: tuple[str, ...]) -> Callable:
+    def parse(data: bytearray) -> tuple:
+        decoded = db_msg.decode(data)
+        return tuple(decoded[x] for x in names)
+
+    return parse
+
+
+def build_dispatch_table() -> dict[int, tuple[tuple[tuple[str, ...], Callable], ...]]:
+    """Maps each arbitration id to `(signal names, extractor)` pairs, the extractor
+    returning the values of those signals from a payload. DBC messages are compiled
+    into one generated extractor each from the cached layouts, falling back to
+    `cantools` for layouts the compiler does not handle."""
+    table: dict[int, list[tuple[tuple[str, ...], Callable]]] = {}
+
+    for frame_id, msg_name, names, layouts in COMPILED_CONFIG["messages"]:
+        if layouts is None:
+            db_msg = config_cache.load_dbc().get_message_by_name(msg_name)
+            extractor = dbc_message_parser(db_msg, names)
+        else:
+            extractor = compile_extractor(frame_id, layouts)
+        table.setdefault(frame_id, []).append((names, extractor))
+
+    return {k: tuple(v) for k, v in table.items()}
+
+
+DISPATCH_TABLE = build_dispatch_table()
+ECU_RESPONSE_ID = CONVERSATION_IDS["ecu_response_id"]
+CURRENT_DATA_RESPONSE_MODE = MODE_IDS["current_data"] + MODE_OFFSET
+FLOW_CONTROL_MESSAGE = can.message.Message(
+    arbitration_id=CONVERSATION_IDS["send_id"],
+    data=FLOW_CONTROL_DATA,
+    is_extended_id=False,
+)
+
+# every id `CanDecoder` decodes, accepted by the fewest kernel filters
+FILTER_IDS = set(COMPILED_CONFIG["filter_ids"])
+FILTERS: list[tuple[int, int]] = COMPILED_CONFIG["filters"]
+CAN_FILTER = [
+    {"can_id": can_id, "can_mask": mask, "extended": False} for can_id, mask in FILTERS
+]
+
+
+def filter_report() -> str:
+    return (
+        f"[Info] CAN filter: {len(FILTER_IDS)} ids in {len(FILTERS)} filters:"
+        f" {filter_description(FILTERS, STANDARD_ID_BITS)}"
+    )
+
+
+def interface_rx_packets(channel: Any) -> Optional[int]:
+    """The receive counter of socketcan interface `channel`, `None` for buses without
+    one, like the virtual bus."""
+    if not isinstance(channel, str):
+        return None
+    try:
+        return int(Path(INTERFACE_RX_PACKETS_PATH.format(channel)).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def decoded_signal_names() -> tuple[str, ...]:
+    """Every signal name `CanDecoder` can publish, in dispatch order."""
+    names = {}
+    for entries in DISPATCH_TABLE.values():
+        for signal_names, _ in entries:
+            names.update(dict.fromkeys(signal_names))
+    for name in CURRENT_DATA_DEFINITIONS:
+        if name in parsers:
+            names[name] = None
+    return tuple(names)
+
+
+if unknown_filters := SIGNAL_FILTERS.keys() - set(decoded_signal_names()):
+    raise ValueError(
+        f"Signal filters for unknown signals: {', '.join(sorted(unknown_filters))}"
+    )
+
+
+def current_data_request(definition_key: str) -> can.message.Message:
+    """The ECU request for the current data PID of `definition_key`."""
+    definition = CURRENT_DATA_DEFINITIONS[definition_key]
+    data = [0x55 for _ in range(8)]
+    data[0] = definition["sent_bytes"]
+    data[1] = MODE_IDS["current_data"]
+    data[2] = definition["pid"]
+
+    return can.message.Message(
+        arbitration_id=CONVERSATION_IDS["send_id"], data=data, is_extended_id=False
+    )
+
+
+def discard_update(name: str, val: Any) -> None:
+    pass
+
+
+class CanDecoder:
+    """
+    Decodes received messages into `car_data` and passes every changed value to
+    `publish(name, value)`. Knows nothing about Qt; `CanHandler` owns one per bus.
+    The filters of the signals in `signal_seeds` start from the given values.
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[str, Any], None] = discard_update,
+        signal_seeds: Optional[dict[str, float]] = None,
+    ) -> None:
+        self.publish = publish
+        self.car_data = CarData()
+        self.received: set[str] = set()
+        self.decoded_updates: Counter[str] = Counter()
+        self.suppressed_updates: Counter[str] = Counter()
+        self.num_frames = 0
+        self.num_unwanted_frames = 0
+        # socketcan interface and its receive counter when counting started
+        self.interface: Optional[str] = None
+        self.interface_rx_start: Optional[int] = None
+        # ECU responses with an unknown PID or data cut short, decoded up to there
+        self.num_malformed_responses = 0
+        self.signal_filters = {
+            name: SignalFilter(name, settings)
+            for name, settings in SIGNAL_FILTERS.items()
+        }
+        for name, val in (signal_seeds or {}).items():
+            if name in self.signal_filters:
+                self.signal_filters[name].seed(val)
+
+        # called with every PID answered by the ECU and the response timestamp
+        self.pid_responded: Optional[Callable[[int, float], Any]] = None
+        # sends the flow control frames of multi-frame ECU responses
+        self.send: Optional[Callable[[can.message.Message], Any]] = None
+        self.iso_tp = IsoTpReceiver(self.send_flow_control)
+
+    def update_car_data(self, name: str, val: Any) -> None:
+        """Stores `val`, after the signal's filter, in `car_data` and publishes it,
+        unless the filter held it back or it is unchanged from the last published
+        value."""
+        self.decoded_updates[name] += 1
+
+        signal_filter = self.signal_filters.get(name)
+        if signal_filter is not None:
+            val = signal_filter.update(val)
+            if val is None:
+                self.suppressed_updates[name] += 1
+                return
+
+        if name in self.received:
+            if getattr(self.car_data, name) == val:
+                self.suppressed_updates[name] += 1
+                return
+        else:
+            self.received.add(name)
+
+        setattr(self.car_data, name, val)
+        self.publish(name, val)
+
+    def suppression_report(self) -> str:
+        decoded = self.decoded_updates.total()
+        suppressed = self.suppressed_updates.total()
+        lines = [
+            f"[Info] Suppressed {suppressed} of {decoded} decoded updates"
+            f" ({suppressed / max(decoded, 1):.1%})"
+        ]
+        for name, count in self.suppressed_updates.most_common():
+            lines.append(f"  {name}: {count}/{self.decoded_updates[name]}")
+        return "\n".join(lines)
+
+    def count_interface_frames(self, channel: Any) -> None:
+        """Counts the frames received on the bus `channel` from now on, before the CAN
+        filter, for `filter_efficiency_report`. Does nothing for buses the kernel keeps
+        no counter for."""
+        self.interface_rx_start = interface_rx_packets(channel)
+        if self.interface_rx_start is not None:
+            self.interface = channel
+
+    def filter_efficiency_report(self) -> str:
+        """Frames on the bus versus frames that passed `CAN_FILTER`, and how many of
+        those the decoder had any use for."""
+        decoded = self.num_frames - self.num_unwanted_frames
+        rx_packets = interface_rx_packets(self.interface)
+        if self.interface_rx_start is None or rx_packets is None:
+            return (
+                "[Info] CAN filter efficiency: no interface counter for this bus,"
+                f" decoded {decoded} of {self.num_frames} frames passing the filter"
+            )
+
+        bus_frames = rx_packets - self.interface_rx_start
+        return (
+            f"[Info] CAN filter efficiency: {self.num_frames} of {bus_frames} frames"
+            f" on {self.interface} passed the filter"
+            f" ({self.num_frames / max(bus_frames, 1):.1%}), {decoded} decoded"
+        )
+
+    def send_flow_control(self) -> None:
+        if self.send is not None:
+            self.send(FLOW_CONTROL_MESSAGE)
+
+    # TODO: used buffered reader for better handling of detecting other devices
+    def parse_response(self, msg: can.message.Message) -> None:
+        payload = self.iso_tp.feed(msg.data, msg.timestamp)
+        if payload is not None:
+            self.parse_current_data(payload, msg.timestamp)
+
+    def parse_current_data(self, payload: memoryview, timestamp: float) -> None:
+        """Decodes a reassembled current data response: the mode, then one or more
+        PIDs, each followed by its data."""
+        if payload[0] != CURRENT_DATA_RESPONSE_MODE:
+            return
+
+        i = 1
+        end = len(payload)
+        while i < end:
+            pid = payload[i]
+            definition = PID_DEFINITIONS.get(pid)
+            if definition is None:
+                # the length of an unknown PID is unknown, so nothing after it is
+                self.num_malformed_responses += 1
+                break
+
+            name, response_length = definition
+            if i + 1 + response_length > end:
+                # shorter than the PID's data, the parsers index past the end
+                self.num_malformed_responses += 1
+                break
+            if name in parsers:
+                self.update_car_data(
+                    name, parsers[name](payload[i + 1 : i + 1 + response_length])
+                )
+            if self.pid_responded is not None:
+                self.pid_responded(pid, timestamp)
+            i += 1 + response_length
+
+    def parse_data(self, msg: can.message.Message) -> None:
+        msg_id = msg.arbitration_id
+        self.num_frames += 1
+
+        if msg_id == ECU_RESPONSE_ID:
+            self.parse_response(msg)
+            return
+
+        entries = DISPATCH_TABLE.get(msg_id)
+        if entries is None:
+            self.num_unwanted_frames += 1
+            return
+
+        msg_data = msg.data
+        for names, extract in entries:
+            for name, val in zip(names, extract(msg_data)):
+                self.update_car_data(name, val)
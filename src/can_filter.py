@@ -0,0 +1,67 @@
+"""
+Coalesces the arbitration ids the dashboard decodes into the fewest `(id, mask)` pairs
+that accept exactly those ids, for the socketcan kernel filter. Every filter is
+checked for every frame on the bus, and every frame it lets through costs GIL time.
+"""
+
+STANDARD_ID_BITS = 11
+
+
+def prime_implicants(ids: set[int], bits: int) -> set[tuple[int, int]]:
+    """All largest `(value, mask)` pairs accepting only ids in `ids` (Quine-McCluskey).
+    Bits outside `mask` are zero in `value`."""
+    full_mask = (1 << bits) - 1
+    terms = {(x & full_mask, full_mask) for x in ids}
+    primes = set()
+
+    while terms:
+        merged = set()
+        used = set()
+        for value, mask in terms:
+            bit = 1
+            while bit <= mask:
+                if mask & bit and not value & bit and (value | bit, mask) in terms:
+                    merged.add((value, mask & ~bit))
+                    used.add((value, mask))
+                    used.add((value | bit, mask))
+                bit <<= 1
+        primes |= terms - used
+        terms = merged
+
+    return primes
+
+
+def coalesce(ids: set[int], bits: int = STANDARD_ID_BITS) -> list[tuple[int, int]]:
+    """The fewest `(id, mask)` pairs found accepting exactly `ids`: essential prime
+    implicants, then the prime implicant accepting the most remaining ids."""
+    primes = prime_implicants(ids, bits)
+    accepted = {x: {y for y in ids if y & x[1] == x[0]} for x in primes}
+    remaining = set(ids)
+    filters = []
+
+    for msg_id in sorted(ids):
+        covering = [x for x in primes if msg_id in accepted[x]]
+        if len(covering) == 1 and covering[0] not in filters:
+            filters.append(covering[0])
+            remaining -= accepted[covering[0]]
+
+    while remaining:
+        best = max(sorted(primes), key=lambda x: (len(accepted[x] & remaining), -x[1]))
+        filters.append(best)
+        remaining -= accepted[best]
+
+    return sorted(filters)
+
+
+def filter_description(filters: list[tuple[int, int]], bits: int) -> str:
+    full_mask = (1 << bits) - 1
+    return ", ".join(
+        f"{value:#05x}" if mask == full_mask else f"{value:#05x}/{mask:#05x}"
+        for value, mask in filters
+    )
+
+
+if __name__ == "__main__":
+    import can_decoder
+
+    print(can_decoder.filter_report())
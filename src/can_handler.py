@@ -1,158 +1,169 @@
-from time import perf_counter
-from inspect import getmembers, isfunction
-from typing import Any
-import cantools
-import tomlkit
+from math import ceil
+from threading import Lock
+from time import time
+from typing import Any, Optional
 import can
 from PyQt5 import QtCore, QtWidgets
 from qutil import timed_func
-from data import CarData
-import can_data_parser
+from can_async import AsyncCanReader
+from can_decoder import CAN_FILTER, CanDecoder, filter_report
+from pid_scheduler import PidScheduler
+from snapshot import SignalSnapshot
 
-parsers = {x[0]: x[1] for x in getmembers(can_data_parser, isfunction)}
-
-
-with open("config/can.toml", "rb") as f:
-    CONFIG: dict[str, Any] = tomlkit.load(f).unwrap()
-    CAN_IDS: dict[str, int] = CONFIG["can_ids"]
-    CONVERSATION_IDS: dict[str, int] = CONFIG["conversation_ids"]
-    CURRENT_DATA_DEFINITIONS: dict[str, dict[str, int]] = CONFIG[
-        "current_data_mode_definitions"
-    ]
-    MODE_IDS: dict[str, int] = CONFIG["mode_ids"]
-
-
-CONVERSATION_WAIT = 2
-CONVERSATION_PERIOD_MS = 50
-
-MODE_OFFSET = 0x40
-
-CAN_ID_ITEMS = CAN_IDS.items()
-CAN_ID_VALUES = CAN_IDS.values()
-CURRENT_DATA_DEFINITION_KEYS = list(CURRENT_DATA_DEFINITIONS.keys())
-CURRENT_DATA_DEFINITION_ITEMS = CURRENT_DATA_DEFINITIONS.items()
-
-NUM_DEFINITIONS = len(CURRENT_DATA_DEFINITIONS)
-
-CAN_FILTER = [
-    {"can_id": x, "can_mask": 0xFFF, "extended": False} for x in CAN_ID_VALUES
-]
-
-for x in CURRENT_DATA_DEFINITIONS.values():
-    CAN_FILTER.append({"can_id": x, "can_mask": 0xFFF, "extended": False})
-
-
-wrx_can_db = cantools.db.load_file("resources/database/subaru_wrx_2018.dbc")
-
-DECODABLE_IDS = []
-for db_msg in wrx_can_db.messages:
-    DECODABLE_IDS.append(db_msg.frame_id)
+# seconds after startup to report how many received frames were decoded
+FILTER_REPORT_DELAY_S = 10
 
 
 class CanHandler(QtWidgets.QWidget):
 
     updated = QtCore.pyqtSignal(tuple)
-    conversation_timer = QtCore.QTimer()
-
-    def __init__(self, parent: QtWidgets.QApplication, bus: can.interface.Bus) -> None:
+    updated_batch = QtCore.pyqtSignal(object)
+    # emitted from the CAN thread for every PID the ECU answers
+    responded = QtCore.pyqtSignal()
+
+    def __init__(
+        self,
+        parent: QtWidgets.QApplication,
+        bus: can.interface.Bus,
+        batch_rate_hz: int = 0,
+        snapshot: Optional[SignalSnapshot] = None,
+        use_asyncio: bool = False,
+        conversation: bool = False,
+        signal_seeds: Optional[dict[str, float]] = None,
+    ) -> None:
+        """`batch_rate_hz` > 0 collects decoded values and emits the latest value of
+        each signal through `updated_batch` at that rate instead of one `updated` per value.
+        With a `snapshot`, values are written into it and published after every message
+        instead, for the GUI to read without any signal.
+
+        `use_asyncio` reads through an `AsyncCanReader`, decoding messages in batches
+        (a snapshot is then published once per batch). `conversation` polls the current
+        data PIDs through a `PidScheduler`, from a coroutine with `use_asyncio` and from
+        a single-shot timer otherwise, both woken by ECU responses. `signal_seeds` are
+        passed to the `CanDecoder`.
+        """
         super().__init__()
         self.bus = bus
         self.q_app = parent
-        self.car_data = CarData()
-        self.conversation_response_debounce = True
-        self.last_conversation_response_time = perf_counter() * 1000
-        self.conversation_list_index = 0
-        self.last_mode_sent = 0
-        self.last_pid_sent = 0
+        self.batch: dict[str, Any] = {}
+        self.batch_lock = Lock()
+        self.batch_timer = None
+        self.conversation_timer = None
+        self.snapshot = snapshot
+
+        if snapshot is not None:
+            self.decoder = CanDecoder(snapshot.write, signal_seeds)
+        elif batch_rate_hz > 0:
+            self.decoder = CanDecoder(self.queue_update, signal_seeds)
+            self.batch_timer = timed_func(
+                parent, self.flush_batch, int(1000 / batch_rate_hz)
+            )
+        else:
+            self.decoder = CanDecoder(self.emit_update, signal_seeds)
+        self.car_data = self.decoder.car_data
+        listener = self.decoder.parse_data
+        if snapshot is not None:
+            listener = self.parse_into_snapshot
+        self.scheduler = None
+        if conversation:
+            self.scheduler = PidScheduler()
+            self.decoder.pid_responded = self.scheduler.response_received
+            self.decoder.send = self.send
 
         self.bus.set_filters(CAN_FILTER)
-
-        self.can_notifier = can.notifier.Notifier(self.bus, [self.parse_data])
-        # timed_func(self.qApp, self.run_conversation, 1)
+        self.decoder.count_interface_frames(self.bus.channel)
+        print(filter_report())
+        QtCore.QTimer.singleShot(
+            FILTER_REPORT_DELAY_S * 1000, self.print_filter_efficiency
+        )
+
+        self.async_reader = None
+        if use_asyncio:
+            self.async_reader = AsyncCanReader(
+                self.bus,
+                self.parse_snapshot_frame if snapshot is not None else listener,
+                snapshot.publish if snapshot is not None else None,
+                self.scheduler,
+            )
+            self.can_notifier = self.async_reader.notifier
+            self.async_reader.start()
+        else:
+            self.can_notifier = can.notifier.Notifier(self.bus, [listener])
+            if conversation:
+                self.decoder.pid_responded = self.pid_responded
+                self.conversation_timer = QtCore.QTimer(parent)
+                self.conversation_timer.setSingleShot(True)
+                self.conversation_timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+                self.conversation_timer.timeout.connect(self.run_conversation)
+                self.responded.connect(self.run_conversation)
+                self.conversation_timer.start(0)
 
     def stop(self) -> None:
-        self.can_notifier.stop()
+        if self.batch_timer:
+            self.batch_timer.stop()
+        if self.conversation_timer:
+            self.conversation_timer.stop()
+        if self.async_reader:
+            self.async_reader.stop()
+        else:
+            self.can_notifier.stop()
         self.bus.shutdown()
 
-    def send(self, msg: can.message.Message) -> None:
-        msg.is_extended_id = False
-        self.bus.send(msg)
+    def parse_snapshot_frame(self, msg: can.message.Message) -> None:
+        self.snapshot.frame_timestamp = msg.timestamp
+        self.decoder.parse_data(msg)
 
-    def run_conversation(self) -> None:
-        current_time = perf_counter() * 1000
-        if self.conversation_response_debounce:
-            self.last_conversation_response_time = current_time
-            self.conversation_response_debounce = False
-
-            definition_index = CURRENT_DATA_DEFINITION_KEYS[
-                self.conversation_list_index
-            ]
-            definition = CURRENT_DATA_DEFINITIONS[definition_index]
-
-            data = [0x55 for _ in range(8)]
-            data[0] = definition["sent_bytes"]
-            data[1] = MODE_IDS["current_data"]
-            data[2] = definition["pid"]
-
-            message = can.message.Message(
-                arbitration_id=CONVERSATION_IDS["send_id"], data=data
-            )
+    def parse_into_snapshot(self, msg: can.message.Message) -> None:
+        self.parse_snapshot_frame(msg)
+        self.snapshot.publish()
 
-            self.last_mode_sent = data[1]
-            self.last_pid_sent = data[2]
+    def emit_update(self, name: str, val: Any) -> None:
+        self.updated.emit((name, val))
 
-            self.send(message)
+    def queue_update(self, name: str, val: Any) -> None:
+        with self.batch_lock:
+            self.batch[name] = val
 
-            self.conversation_list_index += 1
-            if self.conversation_list_index >= NUM_DEFINITIONS:
-                self.conversation_list_index = 0
-        elif (
-            current_time - self.last_conversation_response_time
-            >= CONVERSATION_PERIOD_MS
-        ):
-            print(
-                f"[Warning] No response to last PID [{hex(self.last_pid_sent)}]. Continuing anyway."
-            )
-            self.conversation_response_debounce = True
-            self.last_conversation_response_time = current_time
-
-    # TODO: used buffered reader for better handling of detecting other devices, and conversations
-    def parse_response(self, msg: can.message.Message) -> None:
-        # TODO: handle more expected bits and multiple messages
-        data = msg.data
-        expected_bits = data[0]
-        mode = data[1] - MODE_OFFSET
-        pid = data[2]
-
-        if expected_bits > 8:
-            print(
-                "[Error] Unexpected long message. Currently unable to process this message."
-            )
+    def flush_batch(self) -> None:
+        if not self.batch:
             return
 
-        if mode == self.last_mode_sent and pid == self.last_pid_sent:
-            self.conversation_response_debounce = True
-
-        for i, v in CURRENT_DATA_DEFINITION_ITEMS:
-            if i in parsers and v["pid"] == pid:
-                necessary_data = data[3 : 3 + v["response_length"]]
-                self.updated.emit((i, parsers[i](necessary_data)))
-
-    def parse_data(self, msg: can.message.Message) -> None:
-        msg_id = msg.arbitration_id
-        msg_data = msg.data
-
-        if msg_id == CONVERSATION_IDS["ecu_response_id"]:
-            self.parse_response(msg)
-        elif msg_id in DECODABLE_IDS:
-            decode = wrx_can_db.decode_message(msg_id, msg_data)
-            for msg in decode:
-                db_msg_name, val = msg, decode[msg]
-                setattr(self.car_data, db_msg_name, val)
-                self.updated.emit((db_msg_name, val))
-        else:
-            for db_msg_name, db_msg_id in CAN_ID_ITEMS:
-                if db_msg_name in parsers and db_msg_id == msg_id:
-                    val = parsers[db_msg_name](msg_data)
-                    setattr(self.car_data, db_msg_name, val)
-                    self.updated.emit((db_msg_name, val))
+        with self.batch_lock:
+            batch, self.batch = self.batch, {}
+
+        self.updated_batch.emit(batch)
+
+    def print_filter_efficiency(self) -> None:
+        print(self.decoder.filter_efficiency_report())
+
+    def suppression_report(self) -> str:
+        report = self.decoder.suppression_report()
+        report += "\n" + self.decoder.filter_efficiency_report()
+        if self.async_reader:
+            report += "\n" + self.async_reader.report()
+        if self.scheduler:
+            report += "\n" + self.scheduler.report()
+            report += "\n" + self.decoder.iso_tp.report()
+            report += (
+                f"\n[Info] {self.decoder.num_malformed_responses} ECU responses with"
+                " an unknown or truncated PID"
+            )
+        return report
+
+    def send(self, msg: can.message.Message) -> None:
+        msg.is_extended_id = False
+        self.bus.send(msg)
+
+    def pid_responded(self, pid: int, timestamp: float) -> None:
+        self.scheduler.response_received(pid, timestamp)
+        self.responded.emit()
+
+    def run_conversation(self) -> None:
+        """Sends the requests that are due, then runs again when the next PID is due or
+        an unanswered request times out, or earlier on an ECU response."""
+        now = time()
+        while (message := self.scheduler.next_request(now)) is not None:
+            self.send(message)
+        self.conversation_timer.start(
+            ceil(self.scheduler.seconds_until_next(now) * 1000)
+        )
@@ -0,0 +1,247 @@
+"""
+Decodes CAN traffic in a child process so decoding never competes with Qt painting for
+the GIL. The child owns the bus and writes decoded values into a `SharedSignalTable`
+that the GUI process reads at frame rate.
+"""
+
+import multiprocessing
+import struct
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any, Callable, Optional
+import can
+import can_decoder
+from can_capture import CanRecorder
+from can_decoder import CanDecoder
+
+# version, value, frame timestamp, value type
+SLOT = struct.Struct("<QddB7x")
+
+TYPE_FLOAT = 0
+TYPE_INT = 1
+TYPE_BOOL = 2
+TYPE_CHOICE = 3
+
+# a reader gives up on a writer that died holding the lock
+READ_TIMEOUT_S = 0.1
+STOP_TIMEOUT_S = 2
+
+CHOICE_NAMES: tuple[str, ...] = can_decoder.COMPILED_CONFIG["choice_names"]
+
+
+class SharedSignalTable:
+    """
+    One fixed-size slot per decoded signal in shared memory, laid out from the DBC and
+    `config/can.toml`. Values are stored as doubles with a type tag (DBC choices as an
+    index into `CHOICE_NAMES`), along with the timestamp of the frame they came from.
+
+    The writer holds the lock of `generation`, a shared counter, from the first value
+    of a frame until `end_frame` increments the counter; slots carry the generation
+    that published them. A reader holds the same lock while it reads, so it only sees
+    complete frames. The lock is a semaphore, which orders the shared memory accesses
+    on ARM as well as on x86, where plain memory (a seqlock) would not. Create the
+    table before forking the writer process.
+    """
+
+    def __init__(self) -> None:
+        self.names = can_decoder.decoded_signal_names()
+        self.index = {x: i for i, x in enumerate(self.names)}
+        self.choice_index = {x: i for i, x in enumerate(CHOICE_NAMES)}
+
+        self.memory = SharedMemory(create=True, size=SLOT.size * len(self.names))
+        self.slots = self.memory.buf
+        self.generation = multiprocessing.get_context("fork").Value("Q", 0)
+        self.lock = self.generation.get_lock()
+        # kept by the writer process
+        self.sequence = 0
+        self.writing = False
+        self.frame_timestamp = 0.0
+
+        # read statistics, kept by the GUI process
+        self.read_timestamp: Optional[float] = None
+        self.num_reads = 0
+        self.num_waits = 0
+        self.num_changed = 0
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def write(self, name: str, val: Any) -> None:
+        if not self.writing:
+            self.lock.acquire()
+            self.writing = True
+
+        if val.__class__ is bool:
+            value_type = TYPE_BOOL
+        elif isinstance(val, str):
+            value_type = TYPE_CHOICE
+            val = self.choice_index[val]
+        elif isinstance(val, int):
+            value_type = TYPE_INT
+        else:
+            value_type = TYPE_FLOAT
+
+        SLOT.pack_into(
+            self.slots,
+            SLOT.size * self.index[name],
+            self.sequence + 1,
+            val,
+            self.frame_timestamp,
+            value_type,
+        )
+
+    def end_frame(self) -> None:
+        """Publishes the values written since the last call."""
+        if self.writing:
+            self.sequence += 1
+            self.generation.value = self.sequence
+            self.writing = False
+            self.lock.release()
+
+    def read(self, since: int) -> tuple[int, dict[str, Any]]:
+        """Returns the current generation and every value published after `since`.
+        `read_timestamp` is then the oldest frame timestamp among those values."""
+        if not self.lock.acquire(block=False):
+            self.num_waits += 1
+            if not self.lock.acquire(timeout=READ_TIMEOUT_S):
+                return since, {}
+        try:
+            sequence = self.generation.value
+            rows = [
+                (i, x)
+                for i, x in enumerate(SLOT.iter_unpack(self.slots))
+                if x[0] > since
+            ]
+        finally:
+            self.lock.release()
+
+        names = self.names
+        changed = {}
+        self.read_timestamp = None
+        for i, (_, val, timestamp, value_type) in rows:
+            if value_type == TYPE_BOOL:
+                val = val != 0
+            elif value_type == TYPE_INT:
+                val = int(val)
+            elif value_type == TYPE_CHOICE:
+                val = CHOICE_NAMES[int(val)]
+            changed[names[i]] = val
+            if self.read_timestamp is None or timestamp < self.read_timestamp:
+                self.read_timestamp = timestamp
+
+        self.num_reads += 1
+        self.num_changed += len(changed)
+        return sequence, changed
+
+    def report(self) -> str:
+        reads = max(self.num_reads, 1)
+        return (
+            f"[Info] Shared table: {self.num_reads} reads,"
+            f" {self.num_changed / reads:.1f} changed values per read,"
+            f" {self.num_waits} reads waited for the writer"
+        )
+
+    def close(self) -> None:
+        self.slots = None
+        self.memory.close()
+
+    def unlink(self) -> None:
+        self.memory.unlink()
+
+
+def run_decoder(
+    table: SharedSignalTable,
+    bus_settings: dict[str, Any],
+    stop_event: Any,
+    traffic: Optional[Callable[[], Callable[[], Any]]],
+    record_path: Optional[Path],
+    signal_seeds: Optional[dict[str, float]],
+) -> None:
+    """Child process: decodes everything received on the bus into `table` until
+    `stop_event` is set. `traffic` starts emulated traffic for desktop runs and returns
+    a function that stops it. `signal_seeds` are passed to the `CanDecoder`."""
+    decoder = CanDecoder(table.write, signal_seeds)
+
+    def parse_data(msg: can.message.Message) -> None:
+        table.frame_timestamp = msg.timestamp
+        decoder.parse_data(msg)
+        table.end_frame()
+
+    try:
+        bus = can.thread_safe_bus.ThreadSafeBus(**bus_settings)
+    except (
+        can.exceptions.CanInitializationError,
+        can.exceptions.CanInterfaceNotImplementedError,
+    ):
+        print("[Warning] Could not find can interface device")
+        return
+
+    with bus:
+        bus.set_filters(can_decoder.CAN_FILTER)
+        decoder.count_interface_frames(bus.channel)
+        print(can_decoder.filter_report())
+        notifier = can.notifier.Notifier(bus, [parse_data])
+        recorder = None
+        if record_path is not None:
+            recorder = CanRecorder(record_path)
+            notifier.add_listener(recorder)
+            print(f"[Info] Recording CAN capture to {recorder.file.name}")
+        stop_traffic = traffic() if traffic else None
+
+        try:
+            stop_event.wait()
+        except KeyboardInterrupt:
+            pass
+
+        if stop_traffic:
+            stop_traffic()
+        notifier.stop()
+        if recorder is not None:
+            recorder.stop()
+            print(f"[Info] Recorded {recorder.num_records} CAN messages")
+
+    print(decoder.suppression_report())
+    print(decoder.filter_efficiency_report())
+
+
+class DecoderProcess:
+    """
+    Runs `run_decoder` in a forked child process. Start it before the `QApplication`
+    so no Qt thread exists when forking.
+    """
+
+    def __init__(
+        self,
+        bus_settings: dict[str, Any],
+        traffic: Optional[Callable[[], Callable[[], Any]]] = None,
+        record_path: Optional[Path] = None,
+        signal_seeds: Optional[dict[str, float]] = None,
+    ) -> None:
+        context = multiprocessing.get_context("fork")
+        self.table = SharedSignalTable()
+        self.stop_event = context.Event()
+        self.process = context.Process(
+            target=run_decoder,
+            args=(
+                self.table,
+                bus_settings,
+                self.stop_event,
+                traffic,
+                record_path,
+                signal_seeds,
+            ),
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        self.process.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.process.join(STOP_TIMEOUT_S)
+        if self.process.is_alive():
+            print("[Warning] CAN decoder process did not stop. Terminating it.")
+            self.process.terminate()
+        self.table.close()
+        self.table.unlink()
@@ -0,0 +1,15 @@
+"""
+Command line helpers shared by the dashboard and the offline tools.
+"""
+
+import sys
+from typing import Optional
+
+
+def argv_value(name: str) -> Optional[str]:
+    """Value of a `name=value` command line argument."""
+    prefix = f"{name}="
+    for arg in sys.argv:
+        if arg.startswith(prefix):
+            return arg[len(prefix) :]
+    return None
@@ -0,0 +1,125 @@
+"""
+Build-once cache of everything parsed from `config/` and the DBC at startup. `tomlkit`
+and `cantools` are slow to import and to parse with on the Pi, so their results (both
+TOML files, the layout of every DBC message and the CAN filter list) are written to
+`CACHE_PATH` in `marshal` format and read back in one read on the next boot.
+
+The cache is keyed by the mtime and size of every source, including the modules whose
+output it holds, and rebuilt from the sources whenever one of them changes or the
+cache cannot be read. `python3.11 src/config_cache.py` rebuilds it.
+"""
+
+import marshal
+import os
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+CACHE_PATH = Path("local/config_cache.marshal")
+CAN_CONFIG_PATH = Path("config/can.toml")
+SETTINGS_PATH = Path("config/settings.toml")
+DBC_PATH = Path("resources/database/subaru_wrx_2018.dbc")
+
+SOURCE_PATHS = (
+    CAN_CONFIG_PATH,
+    SETTINGS_PATH,
+    DBC_PATH,
+    Path(__file__),
+    Path(__file__).with_name("bit_layout.py"),
+    Path(__file__).with_name("can_filter.py"),
+)
+
+
+def cache_key() -> tuple:
+    sources = []
+    for path in SOURCE_PATHS:
+        stat = path.stat()
+        sources.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return (marshal.version, sys.implementation.cache_tag, tuple(sources))
+
+
+@lru_cache(maxsize=1)
+def load_dbc() -> Any:
+    """The parsed DBC, for tools and the `cantools` fallback of messages the
+    compiler does not handle. Not needed when the cache is used."""
+    import cantools  # pylint: disable=import-outside-toplevel
+
+    return cantools.db.load_file(str(DBC_PATH))
+
+
+def build() -> dict[str, Any]:
+    """Parses the sources. Messages are `(frame id, name, signal names, layouts)`,
+    layouts being `None` for messages decoded by `cantools`."""
+    # pylint: disable=import-outside-toplevel
+    import tomlkit
+    from bit_layout import message_layouts
+    from can_filter import coalesce
+
+    with open(CAN_CONFIG_PATH, "rb") as f:
+        can_config = tomlkit.load(f).unwrap()
+    with open(SETTINGS_PATH, "rb") as f:
+        settings = tomlkit.load(f).unwrap()
+
+    messages = []
+    choice_names = set()
+    for db_msg in load_dbc().messages:
+        layouts = message_layouts(db_msg, can_config.get("signal_groups", {}))
+        if layouts is None:
+            names = tuple(x.name for x in db_msg.signals)
+        else:
+            names = tuple(layouts)
+        messages.append((db_msg.frame_id, db_msg.name, names, layouts))
+        for signal in db_msg.signals:
+            choice_names.update(str(x) for x in (signal.choices or {}).values())
+
+    filter_ids = {x[0] for x in messages}
+    filter_ids.add(can_config["conversation_ids"]["ecu_response_id"])
+
+    return {
+        "can": can_config,
+        "settings": settings,
+        "messages": messages,
+        "choice_names": tuple(sorted(choice_names)),
+        "filter_ids": tuple(sorted(filter_ids)),
+        "filters": coalesce(filter_ids),
+    }
+
+
+def write(key: tuple, compiled: dict[str, Any]) -> None:
+    # written next to the cache and renamed, so a reader never sees a partial file
+    temp_path = CACHE_PATH.with_name(f"{CACHE_PATH.name}.{os.getpid()}")
+    try:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        temp_path.write_bytes(marshal.dumps((key, compiled)))
+        temp_path.replace(CACHE_PATH)
+    except (OSError, ValueError) as e:
+        print(f"[Warning] Could not write config cache: {e}")
+        temp_path.unlink(missing_ok=True)
+
+
+@lru_cache(maxsize=1)
+def load() -> dict[str, Any]:
+    """The contents of `build`, from the cache if it matches the sources."""
+    key = cache_key()
+    try:
+        cached_key, compiled = marshal.loads(CACHE_PATH.read_bytes())
+        if cached_key == key:
+            return compiled
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    print("[Info] Sources changed, rebuilding config cache")
+    compiled = build()
+    write(key, compiled)
+    return compiled
+
+
+if __name__ == "__main__":
+    CACHE_PATH.unlink(missing_ok=True)
+    cache = load()
+    print(
+        f"[Info] Cached {len(cache['messages'])} DBC messages and"
+        f" {len(cache['filters'])} CAN filters in {CACHE_PATH}"
+        f" ({CACHE_PATH.stat().st_size} bytes)"
+    )
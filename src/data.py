@@ -82,8 +82,12 @@ class OilTempDialConfig:
     blueline: float = 80
 
 
-@dataclass(order=True)
+@dataclass(order=True, slots=True)
 class CarData:
+    """Latest decoded value of every signal. Signal groups (`turn_signals`,
+    `headlights`, `door_states`) are bitmasks with bit i for the i-th signal of the
+    group in `config/can.toml`."""
+
     vehicle_speed: float = 0
     traction_control: bool = True
     traction_control_mode: bool = True
@@ -93,13 +97,13 @@ class CarData:
     throttle_plate_position: float = 0
     clutch_switch: bool = False
     rpm: int = 0
-    gear: int = 0
-    headlights: list[bool] = field(default_factory=lambda: [True, True, True, True])
+    gear: int | str = 0
+    headlights: int = 0b1111
     handbrake_switch: bool = True
     reverse_switch: bool = False
     brake_switch: bool = False
     fuel_level: float = 0
-    turn_signals: list[bool] = field(default_factory=lambda: [True, True])
+    turn_signals: int = 0b11
     seatbelt_driver: bool = False
     coolant_temp: int = 0
     oil_temp: int = 0
@@ -113,6 +117,32 @@ class CarData:
     srs_airbag_system_warning_light: bool = True
     fog_lights: bool = True
     tpms_warning: bool = True
-    door_states: list[bool] = field(default_factory=lambda: [True, True, True, True])
+    door_states: int = 0b11111
     dimmer_dial: int = 0
     odometer: float = 0
+    engine_load: float = 0
+    intake_manifold_absolute_pressure: int = 0
+    timing_advance: float = 0
+    mass_air_flow: float = 0
+    throttle_position: float = 0
+
+
+@dataclass(slots=True)
+class PidPollState:
+    """Polling schedule and statistics of one current data PID."""
+
+    name: str
+    pid: int
+    response_length: int
+    period: float
+    next_due: float = 0
+    sent_time: float | None = None
+    """When the unanswered request for this PID was sent, `None` if there is none."""
+    request: int = 0
+    backoff: int = 1
+    """Multiplier of `period`, doubled on every timeout and reset by a response."""
+    num_requests: int = 0
+    num_responses: int = 0
+    num_timeouts: int = 0
+    latency_total: float = 0
+    latency_max: float = 0
@@ -0,0 +1,295 @@
+"""
+Headless CAN decode benchmark: runs `CanDecoder.parse_data` (config parsers and the
+DBC decode path) over frame mixes without Qt. Run from the repository root:
+
+`python3.11 src/decode_benchmark.py [mix ...] [capture=<path>] [out=<path>] [json]`
+
+Mixes are `synthetic`, `saturated` and `capture` (the latest recorded capture unless
+`capture=` is given). Each run appends one JSON record to `out` so results can be
+compared across revisions; `json` also prints the record instead of the table.
+"""
+
+import gc
+import json
+import platform
+import random
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+from time import perf_counter, perf_counter_ns, strftime
+from typing import Any, Callable, Optional
+import can
+import can_decoder
+import test_module
+from can_capture import latest_capture_path, read_messages
+from cli import argv_value
+from can_decoder import CanDecoder
+
+RESULTS_PATH = Path("local/benchmarks/decode.jsonl")
+SEED = 0
+NUM_FRAMES = 50000
+NUM_REPEATS = 3
+NUM_ALLOCATION_FRAMES = 5000
+PERCENTILES = (50, 90, 99)
+
+BUS_BITRATE = 500000
+# 8 byte standard frame with worst case bit stuffing, including interframe space
+SATURATED_FRAME_BITS = 135
+SATURATED_FRAMES_PER_S = BUS_BITRATE / SATURATED_FRAME_BITS
+
+
+def synthetic_mix(num_frames: int = NUM_FRAMES) -> list[can.message.Message]:
+    """The random traffic the desktop dashboard runs on."""
+    random.seed(SEED)
+    return [test_module.provide_random_message() for _ in range(num_frames)]
+
+
+def saturated_mix(num_frames: int = NUM_FRAMES) -> list[can.message.Message]:
+    """Back to back frames at the 500 kbit/s bus limit, cycling over every decoded id
+    (ECU responses included) with a fresh random payload each time so that no update
+    is suppressed as unchanged. ECU responses have a random (often odd) length and
+    one or two PIDs, so some cut off the data of their last PID."""
+    random.seed(SEED)
+    msg_ids = [*can_decoder.DISPATCH_TABLE.keys(), can_decoder.ECU_RESPONSE_ID]
+    pids = [x["pid"] for x in can_decoder.CURRENT_DATA_DEFINITIONS.values()]
+    response_mode = can_decoder.MODE_IDS["current_data"] + can_decoder.MODE_OFFSET
+    frames = []
+
+    for i in range(num_frames):
+        msg_id = msg_ids[i % len(msg_ids)]
+        data = random.randbytes(8)
+        if msg_id == can_decoder.ECU_RESPONSE_ID:
+            response = [response_mode, random.choice(pids), data[0]]
+            response += [random.choice(pids), data[1], data[2]]
+            length = random.randint(2, len(response))
+            data = bytes([length, *response[:length]]) + data[1 + length :]
+
+        frames.append(
+            can.message.Message(
+                timestamp=i / SATURATED_FRAMES_PER_S,
+                arbitration_id=msg_id,
+                is_extended_id=False,
+                data=data,
+            )
+        )
+
+    return frames
+
+
+def check_malformed_responses() -> None:
+    """ECU responses ending inside the data of a PID are decoded up to that PID."""
+    decoder = CanDecoder()
+    response_mode = can_decoder.MODE_IDS["current_data"] + can_decoder.MODE_OFFSET
+    for pid, (_, response_length) in can_decoder.PID_DEFINITIONS.items():
+        for length in range(response_length + 1):
+            payload = memoryview(bytes([response_mode, pid, *range(length)]))
+            decoder.parse_current_data(payload, 0)
+    expected = sum(x[1] for x in can_decoder.PID_DEFINITIONS.values())
+    assert (
+        decoder.num_malformed_responses == expected
+    ), f"{decoder.num_malformed_responses} malformed responses, expected {expected}"
+
+
+def check_fuel_level_average() -> None:
+    """Repeated identical fuel level frames move the average published by the
+    `fuel_level` signal filter from its seed to their level, one step per frame, and
+    stay there."""
+    msg = can.message.Message(
+        arbitration_id=can_decoder.CAN_IDS["fuel_level"],
+        data=bytes([0x80, 0x10, 0, 0, 0, 0, 0, 0]),
+        is_extended_id=False,
+    )
+    # the first value of an unseeded filter is published as is
+    level_decoder = CanDecoder()
+    level_decoder.parse_data(msg)
+    level = level_decoder.car_data.fuel_level
+
+    averages: list[float] = []
+    decoder = CanDecoder(
+        lambda name, val: averages.append(val) if name == "fuel_level" else None,
+        {"fuel_level": 0.0},
+    )
+    window = can_decoder.SIGNAL_FILTERS["fuel_level"]["mean"]
+    for _ in range(window * 2):
+        decoder.parse_data(msg)
+    assert len(averages) == window, f"{len(averages)} averages over {window} frames"
+    assert all(
+        a < b for a, b in zip(averages, averages[1:])
+    ), "fuel level average did not rise with every frame"
+    assert abs(averages[-1] - level) < 1e-9, f"average {averages[-1]}, level {level}"
+
+
+def capture_mix(path: Optional[str] = None) -> list[can.message.Message]:
+    capture = path or latest_capture_path()
+    if capture is None:
+        raise FileNotFoundError("no recorded capture, run the dashboard with record")
+    return list(read_messages(capture))
+
+
+def percentile(values: list[int], percent: float) -> int:
+    """Nearest-rank percentile of sorted `values`."""
+    return values[max(0, min(len(values) - 1, round(percent / 100 * len(values)) - 1))]
+
+
+def measure_throughput(frames: list[can.message.Message]) -> dict[str, float]:
+    """Best of `NUM_REPEATS` runs, each with a fresh decoder."""
+    best = float("inf")
+    retained_blocks = 0
+
+    for _ in range(NUM_REPEATS):
+        parse_data = CanDecoder().parse_data
+        gc.collect()
+        blocks = sys.getallocatedblocks()
+        start = perf_counter()
+        for msg in frames:
+            parse_data(msg)
+        elapsed = perf_counter() - start
+        if elapsed < best:
+            best = elapsed
+            retained_blocks = sys.getallocatedblocks() - blocks
+
+    frames_per_s = len(frames) / best
+    return {
+        "seconds": best,
+        "frames_per_s": frames_per_s,
+        "realtime_factor": frames_per_s / SATURATED_FRAMES_PER_S,
+        "retained_blocks_per_frame": retained_blocks / len(frames),
+    }
+
+
+def measure_latency(frames: list[can.message.Message]) -> dict[str, dict[str, int]]:
+    """Per arbitration id decode latency percentiles, in nanoseconds."""
+    parse_data = CanDecoder().parse_data
+    latencies: dict[int, list[int]] = {}
+
+    for msg in frames:
+        start = perf_counter_ns()
+        parse_data(msg)
+        elapsed = perf_counter_ns() - start
+        latencies.setdefault(msg.arbitration_id, []).append(elapsed)
+
+    result = {}
+    for msg_id, values in sorted(latencies.items()):
+        values.sort()
+        result[f"0x{msg_id:03X}"] = {
+            "count": len(values),
+            **{f"p{x}": percentile(values, x) for x in PERCENTILES},
+            "max": values[-1],
+        }
+    return result
+
+
+def measure_allocations(frames: list[can.message.Message]) -> dict[str, float]:
+    """Traced allocations over the first `NUM_ALLOCATION_FRAMES` frames: the peak
+    memory a single decode allocates, and what stays allocated afterwards."""
+    frames = frames[:NUM_ALLOCATION_FRAMES]
+    parse_data = CanDecoder().parse_data
+    peak_total = 0
+
+    tracemalloc.start()
+    start_size, _ = tracemalloc.get_traced_memory()
+    for msg in frames:
+        tracemalloc.reset_peak()
+        size, _ = tracemalloc.get_traced_memory()
+        parse_data(msg)
+        _, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - size
+    end_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "peak_alloc_bytes_per_frame": peak_total / len(frames),
+        "retained_bytes_per_frame": (end_size - start_size) / len(frames),
+    }
+
+
+def run_mix(frames: list[can.message.Message]) -> dict[str, Any]:
+    return {
+        "frames": len(frames),
+        **measure_throughput(frames),
+        **measure_allocations(frames),
+        "latency_ns": measure_latency(frames),
+    }
+
+
+def revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(name: str, result: dict[str, Any]) -> None:
+    print(
+        f"[{name}] {result['frames']} frames {result['frames_per_s']:.0f} frames/s"
+        f" ({result['realtime_factor']:.1f}x saturated bus)"
+        f" peak {result['peak_alloc_bytes_per_frame']:.0f} B/frame"
+        f" retained {result['retained_bytes_per_frame']:.1f} B/frame"
+        f" {result['retained_blocks_per_frame']:.3f} blocks/frame"
+    )
+    print(
+        f"  {'id':<6} {'count':>7}"
+        + "".join(f" {f'p{x} ns':>9}" for x in PERCENTILES)
+        + f" {'max ns':>9}"
+    )
+    for msg_id, latency in result["latency_ns"].items():
+        print(
+            f"  {msg_id:<6} {latency['count']:>7}"
+            + "".join(f" {latency[f'p{x}']:>9}" for x in PERCENTILES)
+            + f" {latency['max']:>9}"
+        )
+
+
+MIXES: dict[str, Callable[[], list[can.message.Message]]] = {
+    "synthetic": synthetic_mix,
+    "saturated": saturated_mix,
+    "capture": lambda: capture_mix(argv_value("capture")),
+}
+
+
+def main() -> None:
+    check_malformed_responses()
+    check_fuel_level_average()
+    names = [x for x in sys.argv[1:] if x in MIXES] or list(MIXES.keys())
+    print_json = "json" in sys.argv
+    out_path = Path(argv_value("out") or RESULTS_PATH)
+    record = {
+        "benchmark": "decode",
+        "time": strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "saturated_frames_per_s": SATURATED_FRAMES_PER_S,
+        "mixes": {},
+    }
+
+    for name in names:
+        try:
+            frames = MIXES[name]()
+        except FileNotFoundError as e:
+            print(f"[Warning] Skipping {name} mix: {e}", file=sys.stderr)
+            continue
+
+        result = run_mix(frames)
+        record["mixes"][name] = result
+        if not print_json:
+            print_table(name, result)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+    if print_json:
+        print(json.dumps(record, indent=2))
+    else:
+        print(f"[Info] Results appended to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,43 @@
-from math import ceil, cos, degrees, floor, pi, sin
-from qutil import Line, Arc
-from PyQt5.QtCore import QSize, QLineF, Qt
+from math import ceil, cos, degrees, floor, pi, radians, sin
+from typing import Optional
+from qutil import Line, Arc, Q_DEGREE_MULT
+from PyQt5.QtCore import QPoint, QPointF, QRect, QRectF, QSize, QLineF, Qt
 from PyQt5.QtCore import pyqtProperty
-from PyQt5.QtGui import QColor, QFont, QPalette, QGradient, QRadialGradient
+from PyQt5.QtGui import (
+    QColor,
+    QFont,
+    QFontMetrics,
+    QPainter,
+    QPaintEvent,
+    QPalette,
+    QPen,
+    QPixmap,
+    QPolygonF,
+    QGradient,
+    QRadialGradient,
+    QRegion,
+    QResizeEvent,
+)
 from PyQt5.QtWidgets import QFrame, QLabel, QWidget
 
 # TODO: allow dynamic changing of dial variable. Ex: changing unit, max, min, etc
 
+SECTOR_PADDING = 2
+SECTOR_STEP_DEG = 5
+
 
 class Dial(QWidget):
+    """
+    Gauge with a value arc and needle over static ticks, numbers and outline arcs.
+
+    With `single_widget` the whole dial is painted by this widget: the static geometry
+    is painted once into a face pixmap (rebuilt on resize or `update_face`), and the
+    value arc and needle are drawn over it, repainting only the sector that changed.
+    Otherwise every element is its own child widget.
+    """
+
+    painter = QPainter()
+
     def __init__(
         self,
         parent: QWidget,
@@ -41,6 +70,7 @@ class Dial(QWidget):
         angle_offset: float = pi - pi / 4,
         gradient: bool = True,
         border_width: int = 1,
+        single_widget: bool = True,
     ) -> None:
         super().__init__(parent)
         self.resize(size)
@@ -73,11 +103,7 @@ class Dial(QWidget):
         self.frame.setStyleSheet(f"border-radius: {size.width() // 2}px")
         self.frame.resize(size)
 
-        rad_step = angle_range / visual_max_unit
-        rad_section_step = rad_step / mid_sections
         half_width = size.width() / 2
-        num_x_radius = half_width - buffer_radius - num_radius
-        section_x_radius = half_width - buffer_radius - section_radius
         arc_size_offset = (buffer_radius + section_radius) * 2
         arc_size: QSize = size - QSize(arc_size_offset, arc_size_offset)
         self.dial_offset_angle_deg = 360 - degrees(angle_offset)
@@ -125,149 +151,390 @@ class Dial(QWidget):
             self.blueline_color_dial = self.blueline_color_gradient
             self.default_color_needle = self.default_color_needle_gradient
 
-        self.arc = Arc(self, arc_size, self.default_color_dial, dial_width)
-        self.arc.move(
-            int(half_width - self.arc.width() / 2),
-            int(half_width - self.arc.height() / 2),
+        needle_width = dial_width + dial_width / 8
+        self.arc_origin = QPoint(
+            int(half_width - arc_size.width() / 2),
+            int(half_width - arc_size.height() / 2),
         )
-        self.arc.set_arc(self.dial_offset_angle_deg, 0)
-
-        self.needle = Arc(
-            self, arc_size, self.default_color_needle, dial_width + dial_width / 8
+        self.arc_pen = QPen(
+            self.default_color_dial, dial_width, cap=Qt.PenCapStyle.FlatCap
         )
-        self.needle.move(
-            int(half_width - self.arc.width() / 2),
-            int(half_width - self.arc.height() / 2),
+        self.needle_pen = QPen(
+            self.default_color_needle, needle_width, cap=Qt.PenCapStyle.FlatCap
         )
-        self.needle.set_arc(
-            self.dial_offset_angle_deg - self.needle_width_deg / 2,
-            self.needle_width_deg / 2,
+        self.arc_rect = QRectF(
+            ceil(dial_width / 2),
+            ceil(dial_width / 2),
+            arc_size.width() - dial_width,
+            arc_size.width() - dial_width,
+        )
+        self.needle_rect = QRectF(
+            ceil(needle_width / 2),
+            ceil(needle_width / 2),
+            arc_size.width() - needle_width,
+            arc_size.width() - needle_width,
         )
+        self.sector_center = QPointF(half_width, half_width)
+        # the outline arcs are drawn over the value arc, just outside of it
+        self.sector_outer_radius = arc_size.width() / 2 + border_width + SECTOR_PADDING
+        self.sector_inner_radius = arc_size.width() / 2 - needle_width - SECTOR_PADDING
+        self.arc_color = self.default_color_dial
+        self.painted_angle = 0
+
+        if not single_widget:
+            self.arc = Arc(self, arc_size, self.default_color_dial, dial_width)
+            self.arc.move(self.arc_origin)
+            self.arc.set_arc(self.dial_offset_angle_deg, 0)
+
+            self.needle = Arc(self, arc_size, self.default_color_needle, needle_width)
+            self.needle.move(self.arc_origin)
+            self.needle.set_arc(
+                self.dial_offset_angle_deg - self.needle_width_deg / 2,
+                self.needle_width_deg / 2,
+            )
+
+        self.visual_min_unit = visual_min_unit
+        self.visual_max_unit = visual_max_unit
+        self.mid_sections = mid_sections
+        self.denomination = denomination
+        self.visual_num_gap = visual_num_gap
+        self.line_width = line_width
+        self.no_font = no_font
+        self.label_font = label_font
+        self.dial_width = dial_width
+        self.buffer_radius = buffer_radius
+        self.num_radius = num_radius
+        self.section_radius = section_radius
+        self.minor_section_rad_offset = minor_section_rad_offset
+        self.middle_section_rad_offset = middle_section_rad_offset
+        self.major_section_rad_offset = major_section_rad_offset
+        self.angle_range = angle_range
+        self.angle_offset = angle_offset
+        self.border_width = border_width
+        self.single_widget = single_widget
+        self.face: Optional[QPixmap] = None
+        self.outline: Optional[QPixmap] = None
+
+        if not single_widget:
+            self.build_face_widgets()
+
+    def face_elements(
+        self,
+    ) -> tuple[
+        list[tuple[QLineF, QColor]],
+        list[tuple[QRect, str, QColor]],
+        list[tuple[QRect, float, float, QColor]],
+    ]:
+        """Static geometry of the dial for its current size: tick lines, number labels
+        and outline arcs (`Arc` sized rect, start and span in degrees)."""
+        lines = []
+        labels = []
+        arcs = []
+
+        size = self.size()
+        rad_step = self.angle_range / self.visual_max_unit
+        rad_section_step = rad_step / self.mid_sections
+        half_width = size.width() / 2
+        num_x_radius = half_width - self.buffer_radius - self.num_radius
+        section_x_radius = half_width - self.buffer_radius - self.section_radius
+        arc_size_offset = (self.buffer_radius + self.section_radius) * 2
+        arc_size: QSize = size - QSize(arc_size_offset, arc_size_offset)
+        font_metrics = QFontMetrics(self.label_font)
 
         # TODO: use line width to extend border and eliminate overhang
-        if border_width != 0:
-            self.outline_arc = Arc(
-                self,
-                arc_size + QSize(border_width * 2, border_width * 2),
-                default_color,
-                border_width,
+        if self.border_width != 0:
+            outline_size = arc_size + QSize(
+                self.border_width * 2, self.border_width * 2
             )
-            self.outline_arc.move(
-                int(half_width - self.outline_arc.width() // 2),
-                int(half_width - self.outline_arc.height() // 2),
+            outline_rect = QRect(
+                int(half_width - outline_size.width() // 2),
+                int(half_width - outline_size.height() // 2),
+                outline_size.width(),
+                outline_size.height(),
             )
-            self.outline_arc.set_arc(
-                self.dial_offset_angle_deg,
-                -min(max_unit, redline) * self.dial_angle_step,
+            arcs.append(
+                (
+                    outline_rect,
+                    self.dial_offset_angle_deg,
+                    -min(self.max_unit, self.redline) * self.dial_angle_step,
+                    self.default_color,
+                )
             )
 
-            if redline < max_unit:
-                self.outline_arc_redline = Arc(
-                    self,
-                    arc_size + QSize(border_width * 2, border_width * 2),
-                    redline_color,
-                    border_width,
-                )
-                self.outline_arc_redline.move(
-                    int(half_width) - self.outline_arc_redline.width() // 2,
-                    int(half_width) - self.outline_arc_redline.height() // 2,
-                )
-                self.outline_arc_redline.set_arc(
-                    self.dial_offset_angle_deg + -redline * self.dial_angle_step,
-                    -(max_unit - redline) * self.dial_angle_step,
+            if self.redline < self.max_unit:
+                arcs.append(
+                    (
+                        outline_rect,
+                        self.dial_offset_angle_deg
+                        + -self.redline * self.dial_angle_step,
+                        -(self.max_unit - self.redline) * self.dial_angle_step,
+                        self.redline_color,
+                    )
                 )
 
-        palette = QPalette()
-
-        for major_section in range(visual_min_unit, visual_max_unit + 1):
-            if major_section >= redline / visual_num_gap:
-                color = redline_color
-            elif major_section <= blueline / visual_num_gap:
-                color = blueline_color
+        for major_section in range(self.visual_min_unit, self.visual_max_unit + 1):
+            if major_section >= self.redline / self.visual_num_gap:
+                color = self.redline_color
+            elif major_section <= self.blueline / self.visual_num_gap:
+                color = self.blueline_color
             else:
-                color = default_color
+                color = self.default_color
 
-            palette.setColor(QPalette.ColorRole.WindowText, color)
-
-            if not no_font:
-                label = QLabel(self.frame)
-                label.setStyleSheet("background:transparent")
-                label.setPalette(palette)
-                label.setFont(label_font)
-                label.setAlignment(
-                    Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignVCenter
-                )
-                label.setText(f"{int(major_section * visual_num_gap / denomination)}")
-                label.adjustSize()
-                label.move(
-                    int(
-                        cos(major_section * rad_step + angle_offset)
-                        * (num_x_radius - label.width() / 4)
-                        + half_width
-                        - label.width() / 2
-                    ),
-                    int(
-                        sin(major_section * rad_step + angle_offset)
-                        * (num_x_radius - label.height() / 3)
-                        + half_width
-                        - label.height() / 2
-                    ),
+            if not self.no_font:
+                text = f"{int(major_section * self.visual_num_gap / self.denomination)}"
+                text_size = font_metrics.size(0, text)
+                labels.append(
+                    (
+                        QRect(
+                            int(
+                                cos(major_section * rad_step + self.angle_offset)
+                                * (num_x_radius - text_size.width() / 4)
+                                + half_width
+                                - text_size.width() / 2
+                            ),
+                            int(
+                                sin(major_section * rad_step + self.angle_offset)
+                                * (num_x_radius - text_size.height() / 3)
+                                + half_width
+                                - text_size.height() / 2
+                            ),
+                            text_size.width(),
+                            text_size.height(),
+                        ),
+                        text,
+                        color,
+                    )
                 )
 
-            for mid_section in range(mid_sections):
-                if major_section + mid_section / mid_sections >= redline / visual_num_gap:
-                    color = redline_color
-                elif major_section + mid_section / mid_sections <= blueline / visual_num_gap:
-                    color = blueline_color
+            for mid_section in range(self.mid_sections):
+                section = major_section + mid_section / self.mid_sections
+                if section >= self.redline / self.visual_num_gap:
+                    color = self.redline_color
+                elif section <= self.blueline / self.visual_num_gap:
+                    color = self.blueline_color
                 else:
-                    color = default_color
+                    color = self.default_color
 
                 if mid_section == 0:
                     x_inner_radius = (
-                        section_x_radius - num_radius + major_section_rad_offset
+                        section_x_radius
+                        - self.num_radius
+                        + self.major_section_rad_offset
                     )
-                elif (mid_sections % 2 == 0) and (mid_section == mid_sections / 2):
+                elif (self.mid_sections % 2 == 0) and (
+                    mid_section == self.mid_sections / 2
+                ):
                     x_inner_radius = (
-                        section_x_radius - num_radius + middle_section_rad_offset
+                        section_x_radius
+                        - self.num_radius
+                        + self.middle_section_rad_offset
                     )
                 else:
-                    x_inner_radius = section_x_radius - minor_section_rad_offset
+                    x_inner_radius = section_x_radius - self.minor_section_rad_offset
 
                 x_inner_radius = min(
-                    x_inner_radius, section_x_radius - minor_section_rad_offset
+                    x_inner_radius, section_x_radius - self.minor_section_rad_offset
                 )
 
-                Line(
-                    self.frame,
-                    QLineF(
-                        cos(major_section * rad_step + angle_offset + mid_section * rad_section_step)
-                        * section_x_radius
-                        + half_width,
-                        sin(major_section * rad_step + angle_offset + mid_section * rad_section_step)
-                        * section_x_radius
-                        + half_width,
-                        cos(major_section * rad_step + angle_offset + mid_section * rad_section_step)
-                        * x_inner_radius
-                        + half_width,
-                        sin(major_section * rad_step + angle_offset + mid_section * rad_section_step)
-                        * x_inner_radius
-                        + half_width,
-                    ),
-                    color,
-                    line_width,
+                angle = (
+                    major_section * rad_step
+                    + self.angle_offset
+                    + mid_section * rad_section_step
+                )
+                lines.append(
+                    (
+                        QLineF(
+                            cos(angle) * section_x_radius + half_width,
+                            sin(angle) * section_x_radius + half_width,
+                            cos(angle) * x_inner_radius + half_width,
+                            sin(angle) * x_inner_radius + half_width,
+                        ),
+                        color,
+                    )
                 )
 
-                if major_section == visual_max_unit:
+                if major_section == self.visual_max_unit:
                     break
 
+        return lines, labels, arcs
+
+    def build_face_widgets(self) -> None:
+        """Builds the static geometry as one child widget per tick, number and arc."""
+        lines, labels, arcs = self.face_elements()
+
+        for arc_rect, start, span, color in arcs:
+            arc = Arc(self, arc_rect.size(), color, self.border_width)
+            arc.move(arc_rect.topLeft())
+            arc.set_arc(start, span)
+
+        palette = QPalette()
+        for label_rect, text, color in labels:
+            palette.setColor(QPalette.ColorRole.WindowText, color)
+            label = QLabel(self.frame)
+            label.setStyleSheet("background:transparent")
+            label.setPalette(palette)
+            label.setFont(self.label_font)
+            label.setAlignment(
+                Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignVCenter
+            )
+            label.setText(text)
+            label.setGeometry(label_rect)
+
+        for line, color in lines:
+            Line(self.frame, line, color, self.line_width)
+
+    def blank_pixmap(self) -> QPixmap:
+        pixel_ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(self.size() * pixel_ratio)
+        pixmap.setDevicePixelRatio(pixel_ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        return pixmap
+
+    def render_face(self) -> tuple[QPixmap, QPixmap]:
+        """Paints the static geometry into two pixmaps, stacked like the child widgets:
+        ticks and numbers under the value arc and needle, outline arcs over them."""
+        lines, labels, arcs = self.face_elements()
+        face = self.blank_pixmap()
+        outline = self.blank_pixmap()
+
+        painter = QPainter(outline)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        pen = QPen(QColor(), self.border_width, cap=Qt.PenCapStyle.FlatCap)
+        arc_edge_offset = ceil(self.border_width / 2)
+        for arc_rect, start, span, color in arcs:
+            pen.setColor(color)
+            painter.setPen(pen)
+            painter.drawArc(
+                QRectF(
+                    arc_rect.x() + arc_edge_offset,
+                    arc_rect.y() + arc_edge_offset,
+                    arc_rect.width() - self.border_width,
+                    arc_rect.width() - self.border_width,
+                ),
+                int(start * Q_DEGREE_MULT),
+                int(span * Q_DEGREE_MULT),
+            )
+        painter.end()
+
+        painter = QPainter(face)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setFont(self.label_font)
+        for label_rect, text, color in labels:
+            painter.setPen(color)
+            painter.drawText(label_rect, Qt.AlignmentFlag.AlignCenter, text)
+
+        pen = QPen(QColor(), self.line_width, cap=Qt.PenCapStyle.FlatCap)
+        for line, color in lines:
+            pen.setColor(color)
+            painter.setPen(pen)
+            painter.drawLine(line)
+
+        painter.end()
+        return face, outline
+
+    def paintEvent(self, _: QPaintEvent) -> None:
+        if not self.single_widget:
+            return
+
+        if self.face is None:
+            self.face, self.outline = self.render_face()
+
+        painter = self.painter
+        painter.begin(self)
+        painter.drawPixmap(0, 0, self.face)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.translate(self.arc_origin)
+        painter.setPen(self.arc_pen)
+        painter.drawArc(
+            self.arc_rect,
+            int(self.dial_offset_angle_deg * Q_DEGREE_MULT),
+            int(self.painted_angle * Q_DEGREE_MULT),
+        )
+        painter.setPen(self.needle_pen)
+        painter.drawArc(
+            self.needle_rect,
+            int(
+                (
+                    self.dial_offset_angle_deg
+                    + self.painted_angle
+                    - self.needle_width_deg / 2
+                )
+                * Q_DEGREE_MULT
+            ),
+            int(self.needle_width_deg / 2 * Q_DEGREE_MULT),
+        )
+        painter.resetTransform()
+        painter.drawPixmap(0, 0, self.outline)
+        painter.end()
+
+    def sector_region(self, start: float, end: float) -> QRegion:
+        """Region covering the value arc, needle and outline arc between two angles
+        (degrees, relative to the dial's zero)."""
+        start, end = sorted((start, end))
+        padding = self.needle_width_deg + degrees(
+            SECTOR_PADDING / self.sector_inner_radius
+        )
+        start += self.dial_offset_angle_deg - padding
+        end += self.dial_offset_angle_deg + padding
+        steps = max(1, ceil((end - start) / SECTOR_STEP_DEG))
+
+        outer = []
+        inner = []
+        for i in range(steps + 1):
+            angle = radians(start + (end - start) * i / steps)
+            direction = QPointF(cos(angle), -sin(angle))
+            outer.append(self.sector_center + direction * self.sector_outer_radius)
+            inner.append(self.sector_center + direction * self.sector_inner_radius)
+
+        return QRegion(QPolygonF(outer + inner[::-1]).toPolygon())
+
+    def end_quadrant(self, angle: float) -> float:
+        """Where the part of an arc to `angle` (degrees, relative to the dial's zero)
+        inside the 90 degree quadrant of its end starts. Qt draws an arc as one bezier
+        curve per quadrant, and the curve of the end quadrant is flattened again for
+        every end, moving the antialiased edge pixels of that whole part."""
+        end = self.dial_offset_angle_deg + angle
+        if angle < 0:
+            return min(0, floor(end / 90) * 90 + 90 - self.dial_offset_angle_deg)
+        return max(0, ceil(end / 90) * 90 - 90 - self.dial_offset_angle_deg)
+
+    def resizeEvent(self, a0: QResizeEvent) -> None:
+        self.update_face()
+        return super().resizeEvent(a0)
+
+    def update_face(self) -> None:
+        """Drops the cached face so it is rendered again on the next paint.
+        Call after changing anything that affects the static geometry."""
+        self.face = None
+        self.update()
+
     def update_unit(self) -> None:
         angle = -self._unit * self.dial_angle_step
         if self._unit >= self.redline:
-            self.arc.set_color(self.redline_color_dial)
+            color = self.redline_color_dial
         elif self._unit <= self.blueline:
-            self.arc.set_color(self.blueline_color_dial)
+            color = self.blueline_color_dial
         else:
-            self.arc.set_color(self.default_color_dial)
+            color = self.default_color_dial
+
+        if self.single_widget:
+            last_angle = self.painted_angle
+            self.painted_angle = angle
+            if color is not self.arc_color:
+                self.arc_color = color
+                self.arc_pen.setBrush(color)
+                self.update(self.sector_region(0, max(angle, last_angle, key=abs)))
+            else:
+                angles = (
+                    last_angle,
+                    angle,
+                    self.end_quadrant(last_angle),
+                    self.end_quadrant(angle),
+                )
+                self.update(self.sector_region(min(angles), max(angles)))
+            return
+
+        self.arc.set_color(color)
         self.arc.set_arc(self.dial_offset_angle_deg, angle)
         self.needle.set_arc(
             self.dial_offset_angle_deg + angle - self.needle_width_deg / 2,
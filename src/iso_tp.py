@@ -0,0 +1,112 @@
+"""
+Receiving half of ISO 15765-2 (ISO-TP), which carries diagnostic responses longer than
+one frame: a first frame with the total length, then consecutive frames once the
+receiver answered with a flow control frame.
+"""
+
+from typing import Any, Callable, Optional
+
+SINGLE_FRAME = 0x0
+FIRST_FRAME = 0x1
+CONSECUTIVE_FRAME = 0x2
+FLOW_CONTROL_FRAME = 0x3
+
+# continue to send, no block size limit, no separation time
+FLOW_CONTROL_DATA = [FLOW_CONTROL_FRAME << 4, 0x00, 0x00, 0x55, 0x55, 0x55, 0x55, 0x55]
+
+# largest length a first frame can announce without the 32 bit escape
+MAX_MESSAGE_LENGTH = 0xFFF
+# N_Cr, the longest wait for the next consecutive frame
+CONSECUTIVE_FRAME_TIMEOUT_S = 1
+
+
+class IsoTpReceiver:
+    """
+    Reassembles the messages of one sender into a buffer allocated once. `feed` returns
+    a view of the buffer when a message is complete, valid until the next call.
+    `send_flow_control` is called when a first frame is received.
+    """
+
+    def __init__(
+        self,
+        send_flow_control: Optional[Callable[[], Any]] = None,
+        timeout: float = CONSECUTIVE_FRAME_TIMEOUT_S,
+    ) -> None:
+        self.send_flow_control = send_flow_control
+        self.timeout = timeout
+        self.buffer = bytearray(MAX_MESSAGE_LENGTH)
+        self.view = memoryview(self.buffer)
+        self.length = 0
+        self.received = 0
+        self.sequence = 0
+        self.deadline = 0.0
+
+        self.num_messages = 0
+        self.num_multi_frame = 0
+        self.num_aborted = 0
+
+    def abort(self) -> None:
+        if self.length:
+            self.num_aborted += 1
+            self.length = 0
+
+    def feed(self, data: bytearray, timestamp: float) -> Optional[memoryview]:
+        frame_type = data[0] >> 4
+
+        if frame_type == SINGLE_FRAME:
+            # a single frame interrupts any message in progress
+            self.abort()
+            length = data[0] & 0x0F
+            if not 0 < length < len(data):
+                return None
+
+            self.buffer[:length] = data[1 : 1 + length]
+            self.num_messages += 1
+            return self.view[:length]
+
+        if frame_type == FIRST_FRAME:
+            self.abort()
+            length = (data[0] & 0x0F) << 8 | data[1]
+            if length < 8:
+                return None
+
+            received = len(data) - 2
+            self.buffer[:received] = data[2:]
+            self.length = length
+            self.received = received
+            self.sequence = 1
+            self.deadline = timestamp + self.timeout
+            if self.send_flow_control is not None:
+                self.send_flow_control()
+            return None
+
+        if frame_type == CONSECUTIVE_FRAME and self.length:
+            if timestamp > self.deadline or data[0] & 0x0F != self.sequence:
+                self.abort()
+                return None
+
+            received = min(len(data) - 1, self.length - self.received)
+            self.buffer[self.received : self.received + received] = data[
+                1 : 1 + received
+            ]
+            self.received += received
+            self.sequence = (self.sequence + 1) & 0x0F
+            self.deadline = timestamp + self.timeout
+
+            if self.received < self.length:
+                return None
+
+            length, self.length = self.length, 0
+            self.num_messages += 1
+            self.num_multi_frame += 1
+            return self.view[:length]
+
+        # flow control frames are for senders, and consecutive frames without a first
+        # frame are left over from an aborted message
+        return None
+
+    def report(self) -> str:
+        return (
+            f"[Info] ISO-TP: {self.num_messages} messages,"
+            f" {self.num_multi_frame} multi-frame, {self.num_aborted} aborted"
+        )
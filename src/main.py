@@ -1,15 +1,31 @@
+from time import perf_counter, sleep, time
+
+# measured before the other imports, which take most of the startup
+BOOT_START = perf_counter()
+
+# pylint: disable=wrong-import-position
 import platform
 import subprocess
 import sys
-from typing import Any
-from time import perf_counter
+from importlib import import_module
+from threading import Event, Thread
+from typing import TYPE_CHECKING, Any, Callable, Optional
 from math import pi
 from os import listdir
 from pathlib import Path
-import tomlkit
-import can
-from numpy import average
-from qutil import Image, Arc, delay, timed_func, property_animation, TextLabel
+import tomllib
+from qutil import (
+    Image,
+    Arc,
+    BootTimeline,
+    FramePacer,
+    LatencyMeter,
+    LazyImage,
+    delay,
+    timed_func,
+    property_animation,
+    TextLabel,
+)
 from PyQt5.QtCore import (
     Qt,
     pyqtSignal,
@@ -18,6 +34,7 @@ from PyQt5.QtCore import (
     QPoint,
     QAbstractAnimation,
     QTimer,
+    QEvent,
 )
 from PyQt5.QtGui import (
     QColor,
@@ -29,24 +46,27 @@ from PyQt5.QtGui import (
     QCloseEvent,
 )
 from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget
-from can_handler import (
-    CanHandler,
-    CAN_IDS,
-    CURRENT_DATA_DEFINITIONS,
-)
+import config_cache
+from cli import argv_value
+from snapshot import SignalSnapshot
 from dial import Dial
 from data import *
 
+if TYPE_CHECKING:
+    # the CAN stack is imported by `main` when the bus is opened, after the first frame
+    import can
+    from can_process import SharedSignalTable
+
+
+BOOT_TIMELINE = BootTimeline(BOOT_START)
+BOOT_TIMELINE.mark("imports")
 
 PLATFORM = platform.system()
 RPI = "pi" in sys.argv
-CONFIG_PATH = "config"
 
-# TODO: lazy load
-with open(CONFIG_PATH + "/settings.toml", "rb") as f:
-    settings_toml = tomlkit.load(f)
-    SETTINGS = settings_toml.unwrap()
-    CAN_DEVICE_SETTINGS = SETTINGS["can_device"]
+SETTINGS = config_cache.load()["settings"]
+CAN_DEVICE_SETTINGS = SETTINGS["can_device"]
+BOOT_TIMELINE.mark("settings")
 
 local_data = LocalData()
 can_device_config = CanDeviceConfig()
@@ -66,6 +86,8 @@ FONT_GROUP = settings.fonts["main"]
 
 SCREEN_SIZE = [1920, 720]
 SCREEN_REFRESH_RATE = 75
+EMULATED_FRAME_INTERVAL_S = 0.0005
+VIRTUAL_BUS_SETTINGS = {"channel": "test", "bustype": "virtual"}
 DIAL_SIZE_MAJOR_INT = 660
 DIAL_SIZE_MINOR_INT = 525
 SYMBOL_SIZE = 63
@@ -74,21 +96,24 @@ SYMBOL_SIZE_SMALL = 50
 SYMBOL_SIZE_EXTRA_SMALL = 28
 AWAKEN_SEQUENCE_DURATION = 1750
 AWAKEN_SEQUENCE_DURATION_STALL = 250
-VISUAL_UPDATE_INTERVALS = {}
-
-VISUAL_UPDATE_INVERVAL = 1 / (SCREEN_REFRESH_RATE * 2)
 
 C_TO_F_SCALE = 1.8
 C_TO_F_OFFSET = 32
 KPH_TO_MPH_SCALE = 0.62137119
 KPA_TO_PSI_SCALE = 6.895
 
-AVG_FUEL_SAMPLES = 200
 LOW_FUEL_THRESHHOLD = 15
 NUM_SEATBELT_BLINKS = 15
 SEATBELT_BLINK_INTERVAL_S = 1
 SEATBELT_BLINK_WAIT_S = 15
 
+# bits of the signal groups in config/can.toml
+TURN_SIGNAL_LEFT = 1 << 0
+TURN_SIGNAL_RIGHT = 1 << 1
+LOW_BEAMS = 1 << 0
+PARKING_LIGHTS = 1 << 1
+HIGH_BEAMS = 1 << 2
+
 BACKGROUND_COLOR = QColor(0, 0, 0)
 SYMBOL_BLUE_COLOR = QColor(0, 0, 255)
 SYMBOL_GREEN_COLOR = QColor(0, 230, 0)
@@ -140,32 +165,64 @@ DIAL_PARAMS_MINOR = {
     "angle_offset": MAJOR_DIAL_ANGLE_RANGE - pi + pi / 2.5,
 }
 
+# slow to import and not needed for the first frame, imported on a thread after it
+DEFERRED_IMPORTS = ("tomlkit",)
+
 local_path = Path("local")
 local_data_path = local_path.joinpath("data.toml")
 
 
 def save_local_data():
+    # tomlkit keeps the file's formatting but is slow to import, so it is only
+    # imported here and by `preload_modules`, long after the first frame
+    import tomlkit  # pylint: disable=import-outside-toplevel
+
     with open(LOCAL_DATA_PATH, "w", encoding="UTF-8") as local_data_file:
         tomlkit.dump(local_data.__dict__, local_data_file)
 
 
+def preload_modules() -> None:
+    for name in DEFERRED_IMPORTS:
+        import_module(name)
+
+
 def read_local_data():
     local_path.mkdir(parents=True, exist_ok=True)
     local_data_path.touch(exist_ok=True)
 
     with open(local_data_path, "rb") as file:
-        for k, value in tomlkit.load(file).items():
+        for k, value in tomllib.load(file).items():
             setattr(local_data, k, value)
 
 
-def update_visual_update_intervals(keys: list[str] | Any):
-    for i in keys:
-        if i not in VISUAL_UPDATE_INTERVALS:
-            VISUAL_UPDATE_INTERVALS[i] = VISUAL_UPDATE_INVERVAL
+def signal_seeds() -> dict[str, float]:
+    """Values saved by the last run that the decoder's signal filters start from."""
+    return {"fuel_level": local_data.fuel_level_avg}
 
 
-update_visual_update_intervals(CAN_IDS.keys())
-update_visual_update_intervals(CURRENT_DATA_DEFINITIONS.keys())
+# variable -> `UI` widget that is visible while the variable is truthy
+VISIBILITY_BINDINGS = {
+    "handbrake_switch": "parking_brake_active_image",
+    "traction_control": "traction_control_off_image",
+    "traction_control_mode": "traction_control_mode_image",
+    "cruise_control_status": "cruise_control_status_image",
+    "fog_lights": "fog_light_image",
+    "check_engine_light": "check_engine_light_image",
+    "oil_pressure_warning": "oil_pressure_warning_light_image",
+    "hill_assist": "hill_assist_disabled_warning_light",
+    "srs_airbag_system_warning_light": "srs_airbag_system_warning_light",
+}
+# variables that are decoded but not displayed
+UNBOUND_VARS = (
+    "fuel_consumption",
+    "tpms_warning",
+    "dimmer_dial",
+    "engine_load",
+    "intake_manifold_absolute_pressure",
+    "timing_advance",
+    "mass_air_flow",
+    "throttle_position",
+)
 
 TURN_SIGNAL_OFFSET_X = 70
 TURN_SIGNAL_OFFSET_Y = 40
@@ -175,6 +232,7 @@ BOTTOM_SYMBOL_Y_OFFSET = 10
 class UI(QMainWindow):
 
     closed = pyqtSignal()
+    painted = pyqtSignal()
 
     def __init__(self) -> None:
         super().__init__()
@@ -182,8 +240,28 @@ class UI(QMainWindow):
         background_palette.setColor(QPalette.ColorRole.Background, BACKGROUND_COLOR)
         self.setPalette(background_palette)
 
+        # the first frame is only the background and the dials, see `build_details`
         self.build_dials()
-        self.built_images()
+        self.lazy_images: list[LazyImage] = []
+        # lit from when the details are built until their signals turn them off
+        self.bulb_check_images: list[LazyImage] = []
+        self.build_images()
+
+    def build_details(self) -> None:
+        """Builds everything shown besides the dials and warning lights. Depends on
+        dials to be built first: `self.build_dials`"""
+
+        self.fuel_image = Image(
+            self, IMAGE_PATH + "/lowfuel-warning-light.png", SYMBOL_GRAY_COLOR
+        )
+        self.fuel_image.resize(SYMBOL_SIZE_EXTRA_SMALL, SYMBOL_SIZE_EXTRA_SMALL)
+        self.fuel_image.move(
+            self.fuel_level_gauge.pos()
+            + QPoint(
+                int(DIAL_SIZE_MINOR_INT / 3) - SYMBOL_SIZE_EXTRA_SMALL,
+                int(DIAL_SIZE_MINOR_INT - SYMBOL_SIZE_EXTRA_SMALL * 4.2),
+            )
+        )
 
         angle_mid = 30
         arc_width = 1.5
@@ -301,6 +379,18 @@ class UI(QMainWindow):
             int(SCREEN_SIZE[1] - self.odometer_label.height() - BOTTOM_SYMBOL_Y_OFFSET),
         )
 
+        # created after the window is shown, so not visible with it
+        for widget in (
+            self.fuel_image,
+            self.cruise_control_status_widget,
+            self.fuel_cap_indicator_arrow,
+            self.cruise_control_speed_label,
+            self.speed_label,
+            self.gear_indicator_label,
+            self.odometer_label,
+        ):
+            widget.show()
+
     def build_dials(self) -> None:
 
         self.tachometer = Dial(
@@ -349,272 +439,229 @@ class UI(QMainWindow):
         )
         self.fuel_level_gauge.frame.setStyleSheet("background:transparent")
 
-    def built_images(self) -> None:
+    def lazy_image(
+        self,
+        image_path: str,
+        color: QColor,
+        size: QSize,
+        position: QPoint,
+        transform: Optional[QTransform] = None,
+        bulb_check: bool = False,
+    ) -> LazyImage:
+        image = LazyImage(
+            self, IMAGE_PATH + image_path, color, size, position, transform
+        )
+        self.lazy_images.append(image)
+        if bulb_check:
+            self.bulb_check_images.append(image)
+        return image
+
+    def bottom_symbol_position(self, size: QSize, offset: int) -> QPoint:
+        """Position in the row of symbols at the bottom, `offset` symbols from the
+        center."""
+        return QPoint(
+            int(
+                SCREEN_SIZE[0] / 2
+                - size.width() / 2
+                + offset * (SYMBOL_SIZE + SYMBOL_BUFFER)
+            ),
+            int(SCREEN_SIZE[1] - size.height() - BOTTOM_SYMBOL_Y_OFFSET),
+        )
 
-        """Depends on dials to be built first: `self.build_dials`"""
+    def build_images(self) -> None:
+        """Warning lights, built the first time they are shown, or for the bulb check
+        after the first frame. Depends on dials to be built first: `self.build_dials`"""
         vertical_mirror = QTransform().rotate(180)
-
-        self.traction_control_mode_image = Image(
-            self, IMAGE_PATH + "/traction-mode-indicator-light.png", SYMBOL_GREEN_COLOR
+        symbol_size = QSize(SYMBOL_SIZE, SYMBOL_SIZE)
+        extra_small_symbol_size = QSize(
+            SYMBOL_SIZE_EXTRA_SMALL, SYMBOL_SIZE_EXTRA_SMALL
         )
-        self.traction_control_mode_image.resize(SYMBOL_SIZE, SYMBOL_SIZE)
-        self.traction_control_mode_image.move(
-            int(
-                SCREEN_SIZE[0] / 2 - SYMBOL_SIZE / 2 + 3 * (SYMBOL_SIZE + SYMBOL_BUFFER)
-            ),
-            int(SCREEN_SIZE[1] - SYMBOL_SIZE - BOTTOM_SYMBOL_Y_OFFSET),
+
+        self.traction_control_mode_image = self.lazy_image(
+            "/traction-mode-indicator-light.png",
+            SYMBOL_GREEN_COLOR,
+            symbol_size,
+            self.bottom_symbol_position(symbol_size, 3),
         )
 
-        self.check_engine_light_image = Image(
-            self,
-            IMAGE_PATH + "/check-engine-warning-linght-icon.png",
+        self.check_engine_light_image = self.lazy_image(
+            "/check-engine-warning-linght-icon.png",
             SYMBOL_YELLOW_COLOR,
-        )
-        self.check_engine_light_image.resize(SYMBOL_SIZE, SYMBOL_SIZE)
-        self.check_engine_light_image.move(
-            int(
-                SCREEN_SIZE[0] / 2 - SYMBOL_SIZE / 2 - 5 * (SYMBOL_SIZE + SYMBOL_BUFFER)
-            ),
-            int(SCREEN_SIZE[1] - SYMBOL_SIZE - BOTTOM_SYMBOL_Y_OFFSET),
+            symbol_size,
+            self.bottom_symbol_position(symbol_size, -5),
+            bulb_check=True,
         )
 
-        self.srs_airbag_system_warning_light = Image(
-            self,
-            IMAGE_PATH + "/srs-airbag-system-warning-light.png",
+        srs_airbag_size = QSize(int(SYMBOL_SIZE * 0.90), int(SYMBOL_SIZE * 0.90))
+        self.srs_airbag_system_warning_light = self.lazy_image(
+            "/srs-airbag-system-warning-light.png",
             SYMBOL_RED_COLOR,
-        )
-        self.srs_airbag_system_warning_light.resize(
-            int(SYMBOL_SIZE * 0.90), int(SYMBOL_SIZE * 0.90)
-        )
-        self.srs_airbag_system_warning_light.move(
-            int(
-                SCREEN_SIZE[0] / 2
-                - self.srs_airbag_system_warning_light.width() / 2
-                - 3 * (SYMBOL_SIZE + SYMBOL_BUFFER)
-            ),
-            int(
-                SCREEN_SIZE[1]
-                - self.srs_airbag_system_warning_light.height()
-                - BOTTOM_SYMBOL_Y_OFFSET
-            ),
+            srs_airbag_size,
+            self.bottom_symbol_position(srs_airbag_size, -3),
+            bulb_check=True,
         )
 
-        self.oil_pressure_warning_light_image = Image(
-            self,
-            IMAGE_PATH + "/oil-pressure-warning-light.png",
+        self.oil_pressure_warning_light_image = self.lazy_image(
+            "/oil-pressure-warning-light.png",
             SYMBOL_RED_COLOR,
-        )
-        self.oil_pressure_warning_light_image.resize(SYMBOL_SIZE, SYMBOL_SIZE)
-        self.oil_pressure_warning_light_image.move(
-            int(
-                SCREEN_SIZE[0] / 2 - SYMBOL_SIZE / 2 - 6 * (SYMBOL_SIZE + SYMBOL_BUFFER)
-            ),
-            int(SCREEN_SIZE[1] - SYMBOL_SIZE - BOTTOM_SYMBOL_Y_OFFSET),
+            symbol_size,
+            self.bottom_symbol_position(symbol_size, -6),
+            bulb_check=True,
         )
 
-        self.traction_control_off_image = Image(
-            self,
-            IMAGE_PATH + "/vehicle-dynamics-control-off-indicator-light.png",
+        self.traction_control_off_image = self.lazy_image(
+            "/vehicle-dynamics-control-off-indicator-light.png",
             SYMBOL_YELLOW_COLOR,
-        )
-        self.traction_control_off_image.resize(SYMBOL_SIZE, SYMBOL_SIZE)
-        self.traction_control_off_image.move(
-            int(
-                SCREEN_SIZE[0] / 2 - SYMBOL_SIZE / 2 + 4 * (SYMBOL_SIZE + SYMBOL_BUFFER)
-            ),
-            int(SCREEN_SIZE[1] - SYMBOL_SIZE - BOTTOM_SYMBOL_Y_OFFSET),
+            symbol_size,
+            self.bottom_symbol_position(symbol_size, 4),
+            bulb_check=True,
         )
 
-        self.door_open_warning_image = Image(
-            self, IMAGE_PATH + "/dooropen-warning-light.png", SYMBOL_RED_COLOR
-        )
-        self.door_open_warning_image.resize(SYMBOL_SIZE, SYMBOL_SIZE)
-        self.door_open_warning_image.move(
-            int(
-                SCREEN_SIZE[0] / 2 - SYMBOL_SIZE / 2 + 6 * (SYMBOL_SIZE + SYMBOL_BUFFER)
-            ),
-            int(SCREEN_SIZE[1] - SYMBOL_SIZE - BOTTOM_SYMBOL_Y_OFFSET),
+        self.door_open_warning_image = self.lazy_image(
+            "/dooropen-warning-light.png",
+            SYMBOL_RED_COLOR,
+            symbol_size,
+            self.bottom_symbol_position(symbol_size, 6),
         )
 
-        self.hill_assist_disabled_warning_light = Image(
-            self, IMAGE_PATH + "/hillstartassist-warning-light.png", SYMBOL_YELLOW_COLOR
-        )
-        self.hill_assist_disabled_warning_light.resize(SYMBOL_SIZE, SYMBOL_SIZE)
-        self.hill_assist_disabled_warning_light.move(
-            int(
-                SCREEN_SIZE[0] / 2
-                - SYMBOL_SIZE / 2
-                + 11 * (SYMBOL_SIZE + SYMBOL_BUFFER)
-            ),
-            int(SCREEN_SIZE[1] - SYMBOL_SIZE - BOTTOM_SYMBOL_Y_OFFSET),
+        self.hill_assist_disabled_warning_light = self.lazy_image(
+            "/hillstartassist-warning-light.png",
+            SYMBOL_YELLOW_COLOR,
+            symbol_size,
+            self.bottom_symbol_position(symbol_size, 11),
+            bulb_check=True,
         )
 
-        self.seatbelt_driver_warning_image = Image(
-            self, IMAGE_PATH + "/seatbelt-warning-light.png", SYMBOL_RED_COLOR
-        )
-        self.seatbelt_driver_warning_image.resize(SYMBOL_SIZE, SYMBOL_SIZE)
-        self.seatbelt_driver_warning_image.move(
-            int(
-                SCREEN_SIZE[0] / 2 - SYMBOL_SIZE / 2 + 5 * (SYMBOL_SIZE + SYMBOL_BUFFER)
-            ),
-            int(SCREEN_SIZE[1] - SYMBOL_SIZE - BOTTOM_SYMBOL_Y_OFFSET),
+        self.seatbelt_driver_warning_image = self.lazy_image(
+            "/seatbelt-warning-light.png",
+            SYMBOL_RED_COLOR,
+            symbol_size,
+            self.bottom_symbol_position(symbol_size, 5),
+            bulb_check=True,
         )
 
-        self.cruise_control_status_image = Image(
-            self, IMAGE_PATH + "/cruise-control-indicator-light.png", SYMBOL_GRAY_COLOR
-        )
-        self.cruise_control_status_image.resize(SYMBOL_SIZE, SYMBOL_SIZE)
-        self.cruise_control_status_image.move(
+        self.cruise_control_status_image = self.lazy_image(
+            "/cruise-control-indicator-light.png",
+            SYMBOL_GRAY_COLOR,
+            symbol_size,
             self.speedometer.pos()
             + QPoint(
                 DIAL_SIZE_MAJOR_INT // 2 - SYMBOL_SIZE // 2 - 3,
-                DIAL_SIZE_MAJOR_INT // 2
-                - self.cruise_control_status_image.height() // 2,
+                DIAL_SIZE_MAJOR_INT // 2 - SYMBOL_SIZE // 2,
             )
-            - QPoint(0, int(SYMBOL_SIZE * 1.2))
+            - QPoint(0, int(SYMBOL_SIZE * 1.2)),
         )
 
-        self.coolant_temp_indicator_image_normal = Image(
-            self,
-            IMAGE_PATH + "/coolant-temp-low-high-indicator-light.png",
-            SYMBOL_GRAY_COLOR,
-        )
-        self.coolant_temp_indicator_image_normal.resize(
-            SYMBOL_SIZE_EXTRA_SMALL, SYMBOL_SIZE_EXTRA_SMALL
+        coolant_temp_indicator_position = self.coolant_temp_gauge.pos() + QPoint(
+            int(DIAL_SIZE_MINOR_INT / 3) - SYMBOL_SIZE_EXTRA_SMALL,
+            int(DIAL_SIZE_MINOR_INT - SYMBOL_SIZE_EXTRA_SMALL * 4.2),
         )
-        self.coolant_temp_indicator_image_normal.move(
-            self.coolant_temp_gauge.pos()
-            + QPoint(
-                int(DIAL_SIZE_MINOR_INT / 3) - SYMBOL_SIZE_EXTRA_SMALL,
-                int(DIAL_SIZE_MINOR_INT - SYMBOL_SIZE_EXTRA_SMALL * 4.2),
-            )
+        self.coolant_temp_indicator_image_normal = self.lazy_image(
+            "/coolant-temp-low-high-indicator-light.png",
+            SYMBOL_GRAY_COLOR,
+            extra_small_symbol_size,
+            coolant_temp_indicator_position,
         )
-
-        self.coolant_temp_indicator_image_cold = Image(
-            self,
-            IMAGE_PATH + "/coolant-temp-low-high-indicator-light.png",
+        self.coolant_temp_indicator_image_cold = self.lazy_image(
+            "/coolant-temp-low-high-indicator-light.png",
             SYMBOL_BLUE_COLOR,
+            extra_small_symbol_size,
+            coolant_temp_indicator_position,
         )
-        self.coolant_temp_indicator_image_cold.resize(
-            self.coolant_temp_indicator_image_normal.size()
-        )
-        self.coolant_temp_indicator_image_cold.move(
-            self.coolant_temp_indicator_image_normal.pos()
-        )
-
-        self.coolant_temp_indicator_image_hot = Image(
-            self,
-            IMAGE_PATH + "/coolant-temp-low-high-indicator-light.png",
+        self.coolant_temp_indicator_image_hot = self.lazy_image(
+            "/coolant-temp-low-high-indicator-light.png",
             SYMBOL_RED_COLOR,
-        )
-        self.coolant_temp_indicator_image_hot.resize(
-            self.coolant_temp_indicator_image_normal.size()
-        )
-        self.coolant_temp_indicator_image_hot.move(
-            self.coolant_temp_indicator_image_normal.pos()
+            extra_small_symbol_size,
+            coolant_temp_indicator_position,
         )
 
-        self.fuel_image = Image(
-            self, IMAGE_PATH + "/lowfuel-warning-light.png", SYMBOL_GRAY_COLOR
-        )
-        self.fuel_image.resize(SYMBOL_SIZE_EXTRA_SMALL, SYMBOL_SIZE_EXTRA_SMALL)
-        self.fuel_image.move(
-            self.fuel_level_gauge.pos()
-            + QPoint(
-                int(DIAL_SIZE_MINOR_INT / 3) - SYMBOL_SIZE_EXTRA_SMALL,
-                int(DIAL_SIZE_MINOR_INT - SYMBOL_SIZE_EXTRA_SMALL * 4.2),
-            )
-        )
-
-        self.low_fuel_warning_image = Image(
-            self, IMAGE_PATH + "/lowfuel-warning-light.png", SYMBOL_YELLOW_COLOR
-        )
-        self.low_fuel_warning_image.resize(
-            SYMBOL_SIZE_EXTRA_SMALL, SYMBOL_SIZE_EXTRA_SMALL
-        )
-        self.low_fuel_warning_image.move(
+        self.low_fuel_warning_image = self.lazy_image(
+            "/lowfuel-warning-light.png",
+            SYMBOL_YELLOW_COLOR,
+            extra_small_symbol_size,
             self.fuel_level_gauge.pos()
             + QPoint(
                 int(DIAL_SIZE_MINOR_INT / 3) - SYMBOL_SIZE_EXTRA_SMALL,
                 int(DIAL_SIZE_MINOR_INT - SYMBOL_SIZE_EXTRA_SMALL * 4.2),
-            )
+            ),
+            bulb_check=True,
         )
 
-        self.high_beam_image = Image(
-            self, IMAGE_PATH + "/highbeam-indicator-light.png", SYMBOL_BLUE_COLOR
+        self.high_beam_image = self.lazy_image(
+            "/highbeam-indicator-light.png",
+            SYMBOL_BLUE_COLOR,
+            symbol_size,
+            self.tachometer.pos() + QPoint(SYMBOL_SIZE * 2, 0),
         )
-        self.high_beam_image.resize(SYMBOL_SIZE, SYMBOL_SIZE)
-        self.high_beam_image.move(self.tachometer.pos() + QPoint(SYMBOL_SIZE * 2, 0))
 
-        self.low_beam_image = Image(
-            self, IMAGE_PATH + "/headlight-indicator-light.png", SYMBOL_GREEN_COLOR
-        )
-        self.low_beam_image.resize(int(SYMBOL_SIZE * 1.2), int(SYMBOL_SIZE * 1.2))
-        self.low_beam_image.move(
+        self.low_beam_image = self.lazy_image(
+            "/headlight-indicator-light.png",
+            SYMBOL_GREEN_COLOR,
+            QSize(int(SYMBOL_SIZE * 1.2), int(SYMBOL_SIZE * 1.2)),
             self.speedometer.pos()
-            + QPoint(self.tachometer.width() - SYMBOL_SIZE * 3, 0)
+            + QPoint(self.tachometer.width() - SYMBOL_SIZE * 3, 0),
         )
 
-        self.fog_light_image = Image(
-            self, IMAGE_PATH + "/front-fog-indicator-light.png", SYMBOL_GREEN_COLOR
-        )
-        self.fog_light_image.resize(SYMBOL_SIZE, SYMBOL_SIZE)
-        self.fog_light_image.move(
-            self.tachometer.pos() + QPoint(int(SYMBOL_SIZE / 1.3), SYMBOL_SIZE)
+        self.fog_light_image = self.lazy_image(
+            "/front-fog-indicator-light.png",
+            SYMBOL_GREEN_COLOR,
+            symbol_size,
+            self.tachometer.pos() + QPoint(int(SYMBOL_SIZE / 1.3), SYMBOL_SIZE),
         )
 
-        self.parking_brake_active_image = Image(
-            self,
-            IMAGE_PATH + "/brake-warning-indicator-light-letters-only.png",
+        parking_brake_size = QSize(int(SYMBOL_SIZE * 1.4), int(SYMBOL_SIZE * 1.2))
+        self.parking_brake_active_image = self.lazy_image(
+            "/brake-warning-indicator-light-letters-only.png",
             SYMBOL_RED_COLOR,
-        )
-        self.parking_brake_active_image.resize(
-            int(SYMBOL_SIZE * 1.4), int(SYMBOL_SIZE * 1.2)
-        )
-        self.parking_brake_active_image.move(
+            parking_brake_size,
             self.speedometer.pos()
             + QPoint(
-                DIAL_SIZE_MAJOR_INT // 2 - self.parking_brake_active_image.width() // 2,
-                DIAL_SIZE_MAJOR_INT // 2
-                - self.parking_brake_active_image.height() // 2,
+                DIAL_SIZE_MAJOR_INT // 2 - parking_brake_size.width() // 2,
+                DIAL_SIZE_MAJOR_INT // 2 - parking_brake_size.height() // 2,
             )
-            + QPoint(0, int(SYMBOL_SIZE * 3))
+            + QPoint(0, int(SYMBOL_SIZE * 3)),
+            bulb_check=True,
         )
 
-        self.right_turn_signal_image_active = Image(
-            self, IMAGE_PATH + "/turn-signal-arrow.png", SYMBOL_GREEN_COLOR
-        )
-        self.right_turn_signal_image_active.resize(SYMBOL_SIZE, SYMBOL_SIZE)
-        self.right_turn_signal_image_active.move(
-            self.speedometer.pos() + QPoint(TURN_SIGNAL_OFFSET_X, TURN_SIGNAL_OFFSET_Y)
+        self.right_turn_signal_image_active = self.lazy_image(
+            "/turn-signal-arrow.png",
+            SYMBOL_GREEN_COLOR,
+            symbol_size,
+            self.speedometer.pos() + QPoint(TURN_SIGNAL_OFFSET_X, TURN_SIGNAL_OFFSET_Y),
         )
 
-        self.left_turn_signal_image_active = Image(
-            self,
-            IMAGE_PATH + "/turn-signal-arrow.png",
+        self.left_turn_signal_image_active = self.lazy_image(
+            "/turn-signal-arrow.png",
             SYMBOL_GREEN_COLOR,
-            vertical_mirror,
-        )
-        self.left_turn_signal_image_active.resize(SYMBOL_SIZE, SYMBOL_SIZE)
-        self.left_turn_signal_image_active.move(
+            symbol_size,
             self.tachometer.pos()
             + QPoint(self.tachometer.width() - SYMBOL_SIZE, 0)
-            + QPoint(-TURN_SIGNAL_OFFSET_X, TURN_SIGNAL_OFFSET_Y)
+            + QPoint(-TURN_SIGNAL_OFFSET_X, TURN_SIGNAL_OFFSET_Y),
+            vertical_mirror,
         )
 
     def closeEvent(self, a0: QCloseEvent) -> None:
         self.closed.emit()
         return super().closeEvent(a0)
 
+    def event(self, a0: QEvent) -> bool:
+        handled = super().event(a0)
+        # the window repaints and flushes its backing store on update requests
+        if a0.type() == QEvent.Type.UpdateRequest:
+            self.painted.emit()
+        return handled
+
 
 class Application(QApplication):
 
     awakened = pyqtSignal()
     init_wait = pyqtSignal()
+    details_built = pyqtSignal()
     seatbelt_blink_timer = QTimer()
 
     def __init__(self) -> None:
         super().__init__([])
+        BOOT_TIMELINE.mark("application")
 
         read_local_data()
 
@@ -625,23 +672,42 @@ class Application(QApplication):
                     f"{FONT_PATH}/Montserrat/static/{font_file}"
                 )
 
+        BOOT_TIMELINE.mark("fonts")
+
         self.setOverrideCursor(QCursor(Qt.CursorShape.BlankCursor))
         primary_container = UI()
         primary_container.setFixedSize(*SCREEN_SIZE)
+        BOOT_TIMELINE.mark("dials")
 
         self._last_seatbelt_long_blink_time = 0
         self._last_seatbelt_rapid_blink_time = 0
 
         self.primary_container = primary_container
         self.cluster_vars: dict[str, Any] = {}
-        self.cluster_vars_update_ts: dict[str, float] = {
-            i: perf_counter() for i in VISUAL_UPDATE_INTERVALS.keys()
-        }
+        self.pending_vars: set[str] = set()
+        self.snapshot: Optional[SignalSnapshot | SharedSignalTable] = None
+        self.snapshot_sequence = 0
+        self.bindings = self.build_bindings()
+        self.frame_pacer = FramePacer(self, self.render_frame, SCREEN_REFRESH_RATE)
+        self.latency_meter = LatencyMeter("Frame to pixel latency")
+        self.unpainted_timestamp: Optional[float] = None
+        primary_container.painted.connect(self.record_latency)
+        primary_container.painted.connect(self.show_first_pixel)
+
+        self.init_wait.connect(self.awaken_clusters)
+        self.awakened.connect(lambda: timed_func(self, self.save_local_data, 1000))
+        self.awakened.connect(self.frame_pacer.start)
+        self.awakened.connect(self.print_boot_timeline)
 
-        avg_fuel_stored_val = local_data.fuel_level_avg
-        self.average_fuel_table: list[float] = [
-            avg_fuel_stored_val for _ in range(AVG_FUEL_SAMPLES)
-        ]
+    def show_first_pixel(self) -> None:
+        """Builds the rest of the cluster once the dials are on screen."""
+        self.primary_container.painted.disconnect(self.show_first_pixel)
+        BOOT_TIMELINE.mark("first pixel")
+        QTimer.singleShot(0, self.build_details)
+
+    def build_details(self) -> None:
+        primary_container = self.primary_container
+        primary_container.build_details()
 
         angle_mid = 30
         duration = 500
@@ -748,15 +814,26 @@ class Application(QApplication):
 
         self.primary_container.odometer_label.setText(odo_text)
 
-        self.init_wait.connect(self.awaken_clusters)
-        self.awakened.connect(lambda: timed_func(self, self.save_local_data, 1000))
         self.awakened.connect(self.odometer_text_color_animation_dim.start)
 
+        # bulb check, the other lights stay unbuilt until a signal first shows them
+        for image in primary_container.bulb_check_images:
+            image.prewarm()
+        for image in primary_container.bulb_check_images:
+            image.setVisible(True)
+
+        BOOT_TIMELINE.mark("details")
+        self.details_built.emit()
+        Thread(target=preload_modules, daemon=True).start()
         delay(self, self.init_wait.emit, START_WAIT)
 
+    def print_boot_timeline(self) -> None:
+        BOOT_TIMELINE.mark("awakened")
+        print(BOOT_TIMELINE.report())
+
     def save_local_data(self) -> None:
         odometer = self.cluster_vars.get("odometer", 0)
-        fuel_level_avg = float(average(self.average_fuel_table))
+        fuel_level_avg = self.cluster_vars.get("fuel_level", local_data.fuel_level_avg)
 
         local_data.odometer = odometer
         local_data.fuel_level_avg = fuel_level_avg
@@ -789,7 +866,7 @@ class Application(QApplication):
                 self.primary_container.fuel_level_gauge,
                 "dial_unit",
                 0,
-                int(self.average_fuel_table[0]),
+                int(self.cluster_vars.get("fuel_level", local_data.fuel_level_avg)),
                 duration,
             ).start(QAbstractAnimation.DeletionPolicy.DeleteWhenStopped)
 
@@ -862,9 +939,9 @@ class Application(QApplication):
                     >= SEATBELT_BLINK_WAIT_S
                     + SEATBELT_BLINK_INTERVAL_S * (NUM_SEATBELT_BLINKS + 1)
                 ):
-                    self._last_seatbelt_long_blink_time\
-                    =self._last_seatbelt_rapid_blink_time\
-                    =current_time + SEATBELT_BLINK_WAIT_S
+                    self._last_seatbelt_long_blink_time = (
+                        self._last_seatbelt_rapid_blink_time
+                    ) = (current_time + SEATBELT_BLINK_WAIT_S)
                 elif (
                     current_time - self._last_seatbelt_rapid_blink_time
                     >= SEATBELT_BLINK_INTERVAL_S
@@ -891,217 +968,361 @@ class Application(QApplication):
 
         self.seatbelt_blink_last_state = enabled
 
+    def build_bindings(self) -> dict[str, Optional[Callable[[Any], None]]]:
+        """Resolves which callable displays each variable. `None` binds a variable to
+        nothing, so it is stored in `cluster_vars` but never dispatched."""
+        bindings: dict[str, Optional[Callable[[Any], None]]] = {
+            "vehicle_speed": self.show_vehicle_speed,
+            "rpm": self.show_rpm,
+            "turn_signals": self.show_turn_signals,
+            "fuel_level": self.show_fuel_level,
+            "coolant_temp": self.show_coolant_temp,
+            "reverse_switch": self.show_gear,
+            "clutch_switch": self.show_gear,
+            "gear": self.show_gear,
+            "seatbelt_driver": self.set_seatbelt_indicator,
+            "door_states": self.show_door_states,
+            "headlights": self.show_headlights,
+            "cruise_control_speed": self.show_cruise_control_speed,
+            "cruise_control_set": self.show_cruise_control_set,
+            "odometer": self.show_odometer,
+        }
+
+        for var, widget_name in VISIBILITY_BINDINGS.items():
+            bindings[var] = getattr(self.primary_container, widget_name).setVisible
+
+        for var in UNBOUND_VARS:
+            bindings[var] = None
+
+        return bindings
+
     @pyqtSlot(tuple)
     def update_var(self, data: tuple[str, Any]) -> None:
-        current_time = perf_counter()
         var, val = data
         self.cluster_vars[var] = val
-
-        if current_time - self.cluster_vars_update_ts[var] <= VISUAL_UPDATE_INTERVALS[var]:
+        if self.bindings.get(var):
+            self.pending_vars.add(var)
+
+    @pyqtSlot(object)
+    def update_vars(self, data: dict[str, Any]) -> None:
+        self.cluster_vars.update(data)
+        bindings = self.bindings
+        self.pending_vars.update(x for x in data if bindings.get(x))
+
+    def render_frame(self) -> None:
+        """Applies the newest value of every variable that changed since the last frame."""
+        last_sequence = self.snapshot_sequence
+        if self.snapshot is not None:
+            self.snapshot_sequence, changed = self.snapshot.read(last_sequence)
+            if changed:
+                self.update_vars(changed)
+
+        if not self.pending_vars:
             return
 
-        match var:
-            case "vehicle_speed":
-                val *= KPH_TO_MPH_SCALE
-                self.primary_container.speed_label.setText(f"{val:.0f}")
-                self.primary_container.speedometer.dial_unit = val
-            case "rpm":
-                self.update_gear_indicator()
-                self.primary_container.tachometer.dial_unit = val
-            case "turn_signals":
-                self.primary_container.left_turn_signal_image_active.setVisible(val[0])
-                self.primary_container.right_turn_signal_image_active.setVisible(val[1])
-            case "fuel_level":
-                self.average_fuel_table.pop(0)
-                self.average_fuel_table.append(val)
-
-                avg = float(average(self.average_fuel_table))
-
-                self.primary_container.fuel_level_gauge.dial_unit = avg
-                self.primary_container.low_fuel_warning_image.setVisible(
-                    avg <= LOW_FUEL_THRESHHOLD
-                )
-            case "coolant_temp":
-                converted_val = val * C_TO_F_SCALE + C_TO_F_OFFSET
-                self.primary_container.coolant_temp_gauge.dial_unit = converted_val
-                if converted_val <= coolant_temp_dial_config.redline:
-                    self.primary_container.coolant_temp_indicator_image_normal.setVisible(
-                        False
-                    )
-                    self.primary_container.coolant_temp_indicator_image_cold.setVisible(
-                        True
-                    )
-                    self.primary_container.coolant_temp_indicator_image_hot.setVisible(
-                        False
-                    )
-                elif converted_val >= coolant_temp_dial_config.redline:
-                    self.primary_container.coolant_temp_indicator_image_normal.setVisible(
-                        False
-                    )
-                    self.primary_container.coolant_temp_indicator_image_cold.setVisible(
-                        False
-                    )
-                    self.primary_container.coolant_temp_indicator_image_hot.setVisible(
-                        True
-                    )
-                else:
-                    self.primary_container.coolant_temp_indicator_image_normal.setVisible(
-                        True
-                    )
-                    self.primary_container.coolant_temp_indicator_image_cold.setVisible(
-                        False
-                    )
-                    self.primary_container.coolant_temp_indicator_image_hot.setVisible(
-                        False
-                    )
-            case "handbrake_switch":
-                self.primary_container.parking_brake_active_image.setVisible(val)
-            case "reverse_switch" | "clutch_switch" | "gear":
-                self.update_gear_indicator()
-            case "traction_control":
-                self.primary_container.traction_control_off_image.setVisible(val)
-            case "traction_control_mode":
-                self.primary_container.traction_control_mode_image.setVisible(val)
-            case "seatbelt_driver":
-                self.set_seatbelt_indicator(val)
-            case "cruise_control_status":
-                self.primary_container.cruise_control_status_image.setVisible(val)
-            case "fog_lights":
-                self.primary_container.fog_light_image.setVisible(val)
-            case "door_states":
-                self.primary_container.door_open_warning_image.setVisible(True in val)
-            case "headlights":
-                self.primary_container.low_beam_image.setVisible(val[0] or val[1])
-                self.primary_container.high_beam_image.setVisible(val[2])
-            case "cruise_control_speed":
-                if val > 0 and self.cluster_vars.get("cruise_control_status", 0):
-                    self.primary_container.cruise_control_speed_label.setVisible(True)
-                    self.primary_container.cruise_control_speed_label.setText(f"{val}")
-                else:
-                    self.primary_container.cruise_control_speed_label.setVisible(False)
-            case "cruise_control_set":
-                if val != self.cruise_control_set_last:
-                    self.cruise_control_set_last = val
-                    self.animate_cruise_control(
-                        val and self.cluster_vars.get("cruise_control_status", 0)
-                    )
-            case "check_engine_light":
-                self.primary_container.check_engine_light_image.setVisible(val)
-            case "odometer":
-                if val > 0:
-                    self.primary_container.odometer_label.setText(f"{int(val)}")
-            case "oil_pressure_warning":
-                self.primary_container.oil_pressure_warning_light_image.setVisible(val)
-            case "fuel_consumption":
-                pass
-            case "engine_load":
-                pass
-            case "intake_manifold_absolute_pressure":
-                pass
-            case "timing_advance":
-                pass
-            case "mass_air_flow":
-                pass
-            case "throttle_position":
-                pass
-            case "hill_assist":
-                self.primary_container.hill_assist_disabled_warning_light.setVisible(
-                    val
-                )
-            case "srs_airbag_system_warning_light":
-                self.primary_container.srs_airbag_system_warning_light.setVisible(val)
+        # the first read returns everything decoded before the first frame. Values
+        # of an earlier frame that are not painted yet are flushed with these, so
+        # the oldest timestamp is kept until `record_latency` clears it
+        if (
+            self.snapshot is not None
+            and last_sequence
+            and self.unpainted_timestamp is None
+        ):
+            self.unpainted_timestamp = self.snapshot.read_timestamp
+
+        pending_vars, self.pending_vars = self.pending_vars, set()
+        bindings = self.bindings
+        cluster_vars = self.cluster_vars
+        for var in pending_vars:
+            bindings[var](cluster_vars[var])
+
+    def record_latency(self) -> None:
+        """Time from the oldest CAN frame rendered since the last flush to now, when
+        its pixels are flushed."""
+        if self.unpainted_timestamp is not None:
+            self.latency_meter.add(time() - self.unpainted_timestamp)
+            self.unpainted_timestamp = None
+
+    def show_vehicle_speed(self, val: float) -> None:
+        val *= KPH_TO_MPH_SCALE
+        self.primary_container.speed_label.setText(f"{val:.0f}")
+        self.primary_container.speedometer.dial_unit = val
+
+    def show_rpm(self, val: int) -> None:
+        self.update_gear_indicator()
+        self.primary_container.tachometer.dial_unit = val
+
+    def show_gear(self, _: Any) -> None:
+        self.update_gear_indicator()
+
+    def show_turn_signals(self, val: int) -> None:
+        self.primary_container.left_turn_signal_image_active.setVisible(
+            bool(val & TURN_SIGNAL_LEFT)
+        )
+        self.primary_container.right_turn_signal_image_active.setVisible(
+            bool(val & TURN_SIGNAL_RIGHT)
+        )
+
+    def show_fuel_level(self, val: float) -> None:
+        """`val` is already averaged by its signal filter, see `config/can.toml`."""
+        self.primary_container.fuel_level_gauge.dial_unit = val
+        self.primary_container.low_fuel_warning_image.setVisible(
+            val <= LOW_FUEL_THRESHHOLD
+        )
+
+    def show_coolant_temp(self, val: int) -> None:
+        converted_val = val * C_TO_F_SCALE + C_TO_F_OFFSET
+        self.primary_container.coolant_temp_gauge.dial_unit = converted_val
+        if converted_val <= coolant_temp_dial_config.redline:
+            self.primary_container.coolant_temp_indicator_image_normal.setVisible(False)
+            self.primary_container.coolant_temp_indicator_image_cold.setVisible(True)
+            self.primary_container.coolant_temp_indicator_image_hot.setVisible(False)
+        elif converted_val >= coolant_temp_dial_config.redline:
+            self.primary_container.coolant_temp_indicator_image_normal.setVisible(False)
+            self.primary_container.coolant_temp_indicator_image_cold.setVisible(False)
+            self.primary_container.coolant_temp_indicator_image_hot.setVisible(True)
+        else:
+            self.primary_container.coolant_temp_indicator_image_normal.setVisible(True)
+            self.primary_container.coolant_temp_indicator_image_cold.setVisible(False)
+            self.primary_container.coolant_temp_indicator_image_hot.setVisible(False)
 
-        self.cluster_vars[var] = val
-        self.cluster_vars_update_ts[var] = current_time
+    def show_door_states(self, val: int) -> None:
+        self.primary_container.door_open_warning_image.setVisible(val != 0)
+
+    def show_headlights(self, val: int) -> None:
+        self.primary_container.low_beam_image.setVisible(
+            bool(val & (LOW_BEAMS | PARKING_LIGHTS))
+        )
+        self.primary_container.high_beam_image.setVisible(bool(val & HIGH_BEAMS))
+
+    def show_cruise_control_speed(self, val: int) -> None:
+        if val > 0 and self.cluster_vars.get("cruise_control_status", 0):
+            self.primary_container.cruise_control_speed_label.setVisible(True)
+            self.primary_container.cruise_control_speed_label.setText(f"{val}")
+        else:
+            self.primary_container.cruise_control_speed_label.setVisible(False)
+
+    def show_cruise_control_set(self, val: bool) -> None:
+        if val != self.cruise_control_set_last:
+            self.cruise_control_set_last = val
+            self.animate_cruise_control(
+                val and self.cluster_vars.get("cruise_control_status", 0)
+            )
+
+    def show_odometer(self, val: float) -> None:
+        if val > 0:
+            self.primary_container.odometer_label.setText(f"{int(val)}")
+
+
+def setup_can_interface() -> None:
+    if PLATFORM == "Linux":
+        subprocess.run(["sudo", "/sbin/ip", "link", "set", "can0", "down"], check=True)
+        subprocess.run(
+            [
+                "sudo",
+                "/sbin/ip",
+                "link",
+                "set",
+                "can0",
+                "up",
+                "type",
+                "can",
+                "bitrate",
+                "500000",
+            ],
+            check=True,
+        )
+
+
+def emulate_traffic(
+    replay_path: Optional[Path], replay_speed: float
+) -> Callable[[], None]:
+    """Sends random messages, or replays a capture, to the virtual bus from a
+    background thread, and answers the current data requests sent on it. Returns a
+    function that stops it."""
+    # pylint: disable=import-outside-toplevel
+    import can
+    import test_module
+    from can_capture import CanReplayer
+
+    bus_virtual_car = can.thread_safe_bus.ThreadSafeBus(**VIRTUAL_BUS_SETTINGS)
+
+    def emulate_conversation(msg: can.message.Message) -> None:
+        for response in test_module.provide_response_message(msg):
+            bus_virtual_car.send(response)
+
+    car_notifier = can.notifier.Notifier(bus_virtual_car, [emulate_conversation])
+
+    if replay_path:
+        print(f"[Info] Replaying CAN capture {replay_path}")
+        replayer = CanReplayer(replay_path, bus_virtual_car, replay_speed)
+        replayer.start()
+        stop_sending = replayer.stop
+    else:
+        stopped = Event()
+
+        def emulate_car() -> None:
+            while not stopped.is_set():
+                bus_virtual_car.send(test_module.provide_random_message())
+                sleep(EMULATED_FRAME_INTERVAL_S)
+
+        thread = Thread(target=emulate_car, daemon=True)
+        thread.start()
+
+        def stop_sending() -> None:
+            stopped.set()
+            thread.join()
+
+    def stop() -> None:
+        stop_sending()
+        car_notifier.stop()
+        bus_virtual_car.shutdown()
+
+    return stop
 
 
 def main() -> None:
+    # pylint: disable=import-outside-toplevel
+    using_canbus = "nocan" not in sys.argv
+    batch_updates = "nobatch" not in sys.argv
+    shared_snapshot = "snapshot" in sys.argv
+    multiprocess = "multiprocess" in sys.argv
+    use_asyncio = "asyncio" in sys.argv
+    conversation = "conversation" in sys.argv
+    record_capture = "record" in sys.argv
+    replay_path = argv_value("replay")
+    replay_speed = float(argv_value("speed") or 1)
+
+    if replay_path == "latest":
+        from can_capture import latest_capture_path
+
+        replay_path = latest_capture_path()
+
+    if multiprocess:
+        from can_capture import new_capture_path
+        from can_process import DecoderProcess
+
+        # forked before Qt starts any thread
+        record_path = new_capture_path() if record_capture else None
+        # the application reads it again, the decoder needs it before forking
+        read_local_data()
+        if RPI and using_canbus:
+            setup_can_interface()
+            decoder_process = DecoderProcess(
+                CAN_DEVICE_SETTINGS,
+                record_path=record_path,
+                signal_seeds=signal_seeds(),
+            )
+        else:
+            decoder_process = DecoderProcess(
+                VIRTUAL_BUS_SETTINGS,
+                lambda: emulate_traffic(replay_path, replay_speed),
+                record_path,
+                signal_seeds(),
+            )
+        decoder_process.start()
+
     app = Application()
     screens = app.screens()
-    using_canbus = "nocan" not in sys.argv
-    bus = None
 
-    def post_can_init(bus: can.interface.Bus) -> None:
-        can_app = CanHandler(app, bus)
+    if RPI and using_canbus:
+        app.primary_container.move(screens[0].geometry().topLeft())
+        app.primary_container.showFullScreen()
+        app.primary_container.setFocus()
+    else:
+        app.primary_container.show()
+        if len(screens) > 1:
+            app.primary_container.move(screens[1].geometry().topLeft())
+    BOOT_TIMELINE.mark("window shown")
 
-        def run() -> None:
-            can_app.updated.connect(app.update_var)
+    if multiprocess:
+        app.snapshot = decoder_process.table
 
-        def stop() -> None:
-            can_app.close()
+        def stop_decoder_process() -> None:
+            decoder_process.stop()
+            print(app.frame_pacer.report())
+            print(app.latency_meter.report())
+            print(app.snapshot.report())
             app.closeAllWindows()
 
-        app.aboutToQuit.connect(stop)
+        app.aboutToQuit.connect(stop_decoder_process)
         app.setQuitOnLastWindowClosed(True)
-        app.awakened.connect(run)
-
         sys.exit(app.exec())
 
-    if RPI and using_canbus:
-        screen = screens[0]
-        app.primary_container.move(screen.geometry().topLeft())
-        app.primary_container.showFullScreen()
-        app.primary_container.setFocus()
+    def post_can_init(bus: "can.interface.Bus") -> None:
+        from can_capture import CanRecorder, new_capture_path
+        from can_handler import CanHandler
 
-        try:
-            if PLATFORM == "Linux":
-                subprocess.run(
-                    ["sudo", "/sbin/ip", "link", "set", "can0", "down"], check=True
-                )
-                subprocess.run(
-                    [
-                        "sudo",
-                        "/sbin/ip",
-                        "link",
-                        "set",
-                        "can0",
-                        "up",
-                        "type",
-                        "can",
-                        "bitrate",
-                        "500000",
-                    ],
-                    check=True,
-                )
+        if shared_snapshot:
+            app.snapshot = SignalSnapshot()
+        can_app = CanHandler(
+            app,
+            bus,
+            SCREEN_REFRESH_RATE if batch_updates else 0,
+            app.snapshot,
+            use_asyncio,
+            conversation,
+            signal_seeds(),
+        )
+        recorder = None
 
-            with can.thread_safe_bus.ThreadSafeBus(**CAN_DEVICE_SETTINGS) as bus:
-                post_can_init(bus)
-        except (
-            can.exceptions.CanInitializationError,
-            can.exceptions.CanInterfaceNotImplementedError,
-        ):
-            print("Could not find can interface device. ENTER to quit")
-            input()
-        except OSError:
-            pass  # python-can has its own print
-    else:
-        import test_module
+        if record_capture:
+            recorder = CanRecorder(new_capture_path())
+            can_app.can_notifier.add_listener(recorder)
+            print(f"[Info] Recording CAN capture to {recorder.file.name}")
 
-        app.primary_container.show()
-        if len(screens) > 1:
-            screen = screens[1]
-            app.primary_container.move(screen.geometry().topLeft())
+        def run() -> None:
+            can_app.updated.connect(app.update_var)
+            can_app.updated_batch.connect(app.update_vars)
 
-        with can.thread_safe_bus.ThreadSafeBus(
-            channel="test", bustype="virtual"
-        ) as bus, can.thread_safe_bus.ThreadSafeBus(
-            channel="test", bustype="virtual"
-        ) as bus_virtual_car:
+        def stop() -> None:
+            print(can_app.suppression_report())
+            print(app.frame_pacer.report())
+            if app.snapshot is not None:
+                print(app.latency_meter.report())
+                print(app.snapshot.report())
+            if recorder is not None:
+                can_app.can_notifier.remove_listener(recorder)
+                recorder.stop()
+                print(f"[Info] Recorded {recorder.num_records} CAN messages")
+            can_app.stop()
+            app.closeAllWindows()
 
-            def emulate_car() -> None:
-                bus_virtual_car.send(test_module.provide_random_message())
+        app.aboutToQuit.connect(stop)
+        app.awakened.connect(run)
+        BOOT_TIMELINE.mark("can started")
+
+    def start_can() -> None:
+        import can
+
+        if RPI and using_canbus:
+            try:
+                setup_can_interface()
+                post_can_init(can.thread_safe_bus.ThreadSafeBus(**CAN_DEVICE_SETTINGS))
+            except (
+                can.exceptions.CanInitializationError,
+                can.exceptions.CanInterfaceNotImplementedError,
+            ):
+                print("Could not find can interface device. ENTER to quit")
+                input()
+                app.quit()
+            except OSError:
+                app.quit()  # python-can has its own print
+            return
 
-            def emulate_conversation(msg: can.message.Message) -> None:
-                response = test_module.provide_response_message(msg)
-                bus_virtual_car.send(response)
+        bus = can.thread_safe_bus.ThreadSafeBus(**VIRTUAL_BUS_SETTINGS)
 
-            def run() -> None:
-                can.notifier.Notifier(bus_virtual_car, [emulate_conversation])
-                timed_func(app, emulate_car, 0)
+        def run() -> None:
+            app.aboutToQuit.connect(emulate_traffic(replay_path, replay_speed))
+
+        app.awakened.connect(run)
 
-            app.awakened.connect(run)
+        post_can_init(bus)
 
-            post_can_init(bus)
+    # the bus is opened once the details are built, after the dials are on screen
+    app.details_built.connect(start_can)
+    app.setQuitOnLastWindowClosed(True)
+    sys.exit(app.exec())
 
 
 if __name__ == "__main__":
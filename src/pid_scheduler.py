@@ -0,0 +1,169 @@
+"""
+Polls the current data PIDs of `config/can.toml`, each at its own `rate_hz`, instead of
+cycling through them one request at a time. PIDs that are due together are packed
+into one request, answered with one (multi-frame) response, and up to `max_in_flight`
+requests are sent before the earlier ones are answered.
+"""
+
+from dataclasses import replace
+from threading import Lock
+from typing import Optional
+import can
+from can_decoder import (
+    CONVERSATION_IDS,
+    CONVERSATION_SETTINGS,
+    CURRENT_DATA_DEFINITION_ITEMS,
+    MODE_IDS,
+)
+from data import PidPollState
+
+DEFAULT_RATE_HZ = 4
+DEFAULT_TIMEOUT_MS = 50
+# mode 0x01 requests carry at most 6 PIDs
+MAX_PIDS_PER_REQUEST = 6
+MAX_BACKOFF = 16
+# a PID backs off to no less often than this (or its own period)
+MAX_BACKOFF_PERIOD_S = 1
+
+
+class PidScheduler:
+    """
+    Earliest deadline first: a PID is due one period after it was last requested, and
+    due PIDs are requested in order of their deadline. A PID that times out is polled
+    at half its rate (down to `1 / MAX_BACKOFF`, or once per `MAX_BACKOFF_PERIOD_S`)
+    until it is answered again, so PIDs the ECU does not support stop taking requests
+    from the others.
+
+    Times are `time.time()` seconds, like CAN message timestamps. `next_request` and
+    `response_received` may be called from different threads.
+    """
+
+    def __init__(self) -> None:
+        self.states = {
+            v["pid"]: PidPollState(
+                name,
+                v["pid"],
+                v["response_length"],
+                1 / v.get("rate_hz", DEFAULT_RATE_HZ),
+            )
+            for name, v in CURRENT_DATA_DEFINITION_ITEMS
+        }
+        self.max_pids = min(
+            CONVERSATION_SETTINGS.get("max_pids_per_request", 1), MAX_PIDS_PER_REQUEST
+        )
+        self.max_in_flight = CONVERSATION_SETTINGS.get("max_in_flight", 1)
+        self.timeout = (
+            CONVERSATION_SETTINGS.get("timeout_ms", DEFAULT_TIMEOUT_MS) / 1000
+        )
+        self.lock = Lock()
+        self.num_requests = 0
+        self.start_time: Optional[float] = None
+        self.last_time = 0.0
+
+    @staticmethod
+    def poll_period(state: PidPollState) -> float:
+        if state.backoff == 1:
+            return state.period
+        return min(
+            state.period * state.backoff, max(state.period, MAX_BACKOFF_PERIOD_S)
+        )
+
+    def requests_in_flight(self) -> int:
+        return len({x.request for x in self.states.values() if x.sent_time is not None})
+
+    def expire(self, now: float) -> None:
+        for state in self.states.values():
+            if state.sent_time is not None and now - state.sent_time >= self.timeout:
+                state.sent_time = None
+                state.num_timeouts += 1
+                first_miss = state.backoff == 1
+                previous_period = self.poll_period(state)
+                state.backoff = min(state.backoff * 2, MAX_BACKOFF)
+                period = self.poll_period(state)
+                # log the first miss and reaching the longest interval, not every retry
+                if first_miss or (
+                    period > previous_period
+                    and period == self.poll_period(replace(state, backoff=MAX_BACKOFF))
+                ):
+                    print(
+                        f"[Warning] No response to PID [{hex(state.pid)}]."
+                        f" Polling it every {period:.2f} s."
+                    )
+
+    def next_request(self, now: float) -> Optional[can.message.Message]:
+        """The request to send now, or `None` if nothing is due or too many requests
+        are unanswered."""
+        with self.lock:
+            self.expire(now)
+            if self.requests_in_flight() >= self.max_in_flight:
+                return None
+
+            due = sorted(
+                (
+                    x
+                    for x in self.states.values()
+                    if x.sent_time is None and x.next_due <= now
+                ),
+                key=lambda x: x.next_due,
+            )
+            pids = []
+            for state in due[: self.max_pids]:
+                pids.append(state.pid)
+                state.sent_time = now
+                state.request = self.num_requests
+                state.num_requests += 1
+                state.next_due = now + self.poll_period(state)
+
+            if not pids:
+                return None
+
+            if self.start_time is None:
+                self.start_time = now
+            self.last_time = now
+            self.num_requests += 1
+
+        data = [1 + len(pids), MODE_IDS["current_data"], *pids]
+        data += [0x55] * (8 - len(data))
+        return can.message.Message(
+            arbitration_id=CONVERSATION_IDS["send_id"], data=data, is_extended_id=False
+        )
+
+    def response_received(self, pid: int, timestamp: float) -> None:
+        with self.lock:
+            state = self.states.get(pid)
+            if state is None or state.sent_time is None:
+                return
+
+            latency = timestamp - state.sent_time
+            state.sent_time = None
+            state.backoff = 1
+            state.num_responses += 1
+            state.latency_total += latency
+            state.latency_max = max(state.latency_max, latency)
+            self.last_time = max(self.last_time, timestamp)
+
+    def seconds_until_next(self, now: float) -> float:
+        """Time until a PID is due or an unanswered request times out. Due PIDs only
+        count while another request can be sent."""
+        with self.lock:
+            can_send = self.requests_in_flight() < self.max_in_flight
+            deadlines = [
+                x.sent_time + self.timeout if x.sent_time is not None else x.next_due
+                for x in self.states.values()
+                if x.sent_time is not None or can_send
+            ]
+        return max(0.0, min(deadlines, default=self.timeout) - now)
+
+    def report(self) -> str:
+        elapsed = max(self.last_time - (self.start_time or self.last_time), 1e-9)
+        lines = [f"[Info] {self.num_requests} PID requests in {elapsed:.1f} s"]
+        for state in self.states.values():
+            responses = max(state.num_responses, 1)
+            lines.append(
+                f"  {state.name}: target {1 / state.period:.1f} Hz"
+                f" achieved {state.num_responses / elapsed:.1f} Hz,"
+                f" latency avg {state.latency_total / responses * 1000:.2f} ms"
+                f" max {state.latency_max * 1000:.2f} ms,"
+                f" {state.num_timeouts} timeouts"
+            )
+        return "\n".join(lines)
@@ -1,4 +1,9 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from hashlib import sha1
 from math import ceil
+from pathlib import Path
 from time import perf_counter
 from typing import Any, Callable, Optional
 from PyQt5 import QtGui
@@ -23,12 +28,42 @@ from PyQt5.QtCore import (
     QTimer,
     QPropertyAnimation,
     QObject,
+    QPoint,
 )
 
 Q_DEGREE_MULT = 16
 
+ALPHA_MASK = 0xFF000000
+RGB_MASK = 0x00FFFFFF
+BULK_RECOLOR_FORMATS = (QImage.Format.Format_ARGB32, QImage.Format.Format_RGB32)
+
+ICON_CACHE_PATH = Path("local/icon_cache")
+ICON_CACHE_SIZE = 64
+# renders icons ahead of `LazyImage`s being shown, QImage is safe outside the GUI thread
+ICON_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="icons")
+
 
 def change_image_color(image: QImage, color: QColor) -> None:
+    """Sets every visible pixel to `color`, keeping the pixel's alpha."""
+    if image.format() not in BULK_RECOLOR_FORMATS:
+        change_image_color_per_pixel(image, color)
+        return
+
+    # only needed when an icon is not in the icon cache, so kept off the boot path
+    import numpy  # pylint: disable=import-outside-toplevel
+
+    ptr = image.bits()
+    ptr.setsize(image.sizeInBytes())
+    pixels = numpy.frombuffer(ptr, numpy.uint32).reshape(
+        image.height(), image.bytesPerLine() // 4
+    )[:, : image.width()]
+
+    alpha = pixels & ALPHA_MASK
+    visible = alpha != 0
+    pixels[visible] = alpha[visible] | (color.rgb() & RGB_MASK)
+
+
+def change_image_color_per_pixel(image: QImage, color: QColor) -> None:
     for x in range(image.width()):
         for y in range(image.height()):
             pcolor = image.pixelColor(x, y)
@@ -38,7 +73,89 @@ def change_image_color(image: QImage, color: QColor) -> None:
                 image.setPixelColor(x, y, n_color)
 
 
+def transform_key(transform: Optional[QTransform]) -> Optional[tuple[float, ...]]:
+    if transform is None or transform.isIdentity():
+        return None
+
+    return (
+        transform.m11(),
+        transform.m12(),
+        transform.m13(),
+        transform.m21(),
+        transform.m22(),
+        transform.m23(),
+        transform.m31(),
+        transform.m32(),
+        transform.m33(),
+    )
+
+
+@lru_cache(maxsize=ICON_CACHE_SIZE)
+def render_icon(
+    image_path: str,
+    rgb: Optional[int],
+    width: int,
+    height: int,
+    transform: Optional[tuple[float, ...]],
+) -> QImage:
+    """Tinted, transformed and scaled icon. Rendered icons are kept in memory and in
+    `ICON_CACHE_PATH`, keyed by the arguments and the source file's mtime and size."""
+    source_stat = Path(image_path).stat()
+    cache_key = (
+        image_path,
+        source_stat.st_mtime_ns,
+        source_stat.st_size,
+        rgb,
+        width,
+        height,
+        transform,
+    )
+    cache_file = ICON_CACHE_PATH.joinpath(sha1(repr(cache_key).encode()).hexdigest())
+    cache_file = cache_file.with_suffix(".png")
+
+    if cache_file.exists():
+        image = QImage(str(cache_file))
+        if not image.isNull():
+            return image
+
+    image = QImage(image_path)
+    if rgb is not None:
+        change_image_color(image, QColor.fromRgb(rgb))
+    if transform:
+        image = image.transformed(QTransform(*transform))
+    image = image.scaled(
+        width,
+        height,
+        Qt.AspectRatioMode.IgnoreAspectRatio,
+        Qt.TransformationMode.SmoothTransformation,
+    )
+
+    ICON_CACHE_PATH.mkdir(parents=True, exist_ok=True)
+    image.save(str(cache_file))
+
+    return image
+
+
+def cached_icon(
+    image_path: str,
+    color: Optional[QColor],
+    size: QSize,
+    transform: Optional[QTransform] = None,
+) -> QPixmap:
+    return QPixmap.fromImage(
+        render_icon(
+            image_path,
+            color.rgb() & RGB_MASK if color else None,
+            size.width(),
+            size.height(),
+            transform_key(transform),
+        )
+    )
+
+
 class Image(QLabel):
+    """Icon rendered at the widget's size through `cached_icon`, so painting never scales."""
+
     def __init__(
         self,
         parent: QWidget,
@@ -48,25 +165,78 @@ class Image(QLabel):
     ):
         super().__init__(parent)
 
+        self.image_path = image_path
+        self.color = color
         self.transform = transform
 
-        self.image = QImage(image_path)
-        if color:
-            change_image_color(self.image, color)
-
         self.setStyleSheet("background:transparent")
-        self.setScaledContents(True)
-        self.update()
 
     def set_color(self, color: QColor) -> None:
-        change_image_color(self.image, color)
+        self.color = color
         self.update()
 
     def update(self) -> None:
-        self._pixmap = QPixmap.fromImage(self.image)
-        if self.transform:
-            self._pixmap = self._pixmap.transformed(self.transform)
-        self.setPixmap(self._pixmap)
+        self.setPixmap(
+            cached_icon(self.image_path, self.color, self.size(), self.transform)
+        )
+
+    def resizeEvent(self, a0: QtGui.QResizeEvent) -> None:
+        self.update()
+        return super().resizeEvent(a0)
+
+
+class LazyImage:
+    """
+    Stands in for an `Image` that is built the first time it is shown, so widgets
+    that are rarely visible cost nothing at startup. `prewarm` renders its icon on
+    `ICON_POOL` ahead of time.
+    """
+
+    def __init__(
+        self,
+        parent: QWidget,
+        image_path: str,
+        color: Optional[QColor],
+        size: QSize,
+        position: QPoint,
+        transform: Optional[QTransform] = None,
+    ) -> None:
+        self.parent = parent
+        self.image_path = image_path
+        self.color = color
+        self.size = size
+        self.position = position
+        self.transform = transform
+        self.image: Optional[Image] = None
+        self.icon: Optional[Future] = None
+
+    def prewarm(self) -> None:
+        if self.icon is None and self.image is None:
+            self.icon = ICON_POOL.submit(
+                render_icon,
+                self.image_path,
+                self.color.rgb() & RGB_MASK if self.color else None,
+                self.size.width(),
+                self.size.height(),
+                transform_key(self.transform),
+            )
+
+    def build(self) -> Image:
+        if self.image is None:
+            if self.icon is not None:
+                # the icon is then in the memory cache of `render_icon`
+                self.icon.result()
+            self.image = Image(self.parent, self.image_path, self.color, self.transform)
+            self.image.resize(self.size)
+            self.image.move(self.position)
+        return self.image
+
+    def setVisible(self, visible: bool) -> None:
+        if visible or self.image is not None:
+            self.build().setVisible(visible)
+
+    def isVisible(self) -> bool:
+        return self.image is not None and self.image.isVisible()
 
 
 class Line(QWidget):
@@ -202,6 +372,124 @@ def timed_func(app: QApplication, f: Callable[..., Any], delay_ms: int) -> QTime
     return t
 
 
+class FramePacer:
+    """Calls `f` once per frame from a precise timer and keeps frame time, jitter and
+    dropped frame statistics."""
+
+    def __init__(self, app: QApplication, f: Callable[[], Any], rate_hz: float) -> None:
+        self.f = f
+        self.interval_ms = round(1000 / rate_hz)
+        self.period = self.interval_ms / 1000
+        self.timer = QTimer(app)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.frame)
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.frames = 0
+        self.dropped_frames = 0
+        self.frame_time_total = 0.0
+        self.frame_time_max = 0.0
+        self.jitter_total = 0.0
+        self.jitter_max = 0.0
+        self.last_frame_start: Optional[float] = None
+
+    def start(self) -> None:
+        self.last_frame_start = None
+        self.timer.start(self.interval_ms)
+
+    def stop(self) -> None:
+        self.timer.stop()
+
+    def frame(self) -> None:
+        start = perf_counter()
+
+        if self.last_frame_start is not None:
+            interval = start - self.last_frame_start
+            jitter = abs(interval - self.period)
+            self.jitter_total += jitter
+            self.jitter_max = max(self.jitter_max, jitter)
+            self.dropped_frames += max(0, round(interval / self.period) - 1)
+        self.last_frame_start = start
+
+        self.f()
+
+        frame_time = perf_counter() - start
+        self.frames += 1
+        self.frame_time_total += frame_time
+        self.frame_time_max = max(self.frame_time_max, frame_time)
+
+    def report(self) -> str:
+        frames = max(self.frames, 1)
+        return (
+            f"[Info] {self.frames} frames, {self.dropped_frames} dropped."
+            f" Frame time avg {self.frame_time_total / frames * 1000:.2f} ms"
+            f" max {self.frame_time_max * 1000:.2f} ms."
+            f" Jitter avg {self.jitter_total / frames * 1000:.2f} ms"
+            f" max {self.jitter_max * 1000:.2f} ms"
+        )
+
+
+class LatencyMeter:
+    """Collects latencies in seconds. Percentiles are over the last `max_samples`."""
+
+    def __init__(self, name: str, max_samples: int = 10000) -> None:
+        self.name = name
+        self.samples: deque[float] = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, latency: float) -> None:
+        self.samples.append(latency)
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+
+    def report(self) -> str:
+        if not self.count:
+            return f"[Info] {self.name}: no samples"
+
+        samples = sorted(self.samples)
+        p50 = samples[len(samples) // 2]
+        p99 = samples[min(len(samples) - 1, len(samples) * 99 // 100)]
+        return (
+            f"[Info] {self.name}: {self.count} samples."
+            f" Avg {self.total / self.count * 1000:.2f} ms"
+            f" p50 {p50 * 1000:.2f} ms p99 {p99 * 1000:.2f} ms"
+            f" max {self.max * 1000:.2f} ms"
+        )
+
+
+class BootTimeline:
+    """Named points in time since `start`, a `perf_counter` value, to measure
+    startup stages."""
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.marks: list[tuple[str, float]] = []
+
+    def mark(self, name: str) -> None:
+        self.marks.append((name, perf_counter()))
+
+    def elapsed(self, name: str) -> Optional[float]:
+        for mark, time in self.marks:
+            if mark == name:
+                return time - self.start
+        return None
+
+    def report(self) -> str:
+        lines = ["[Info] Boot timeline:"]
+        last = self.start
+        for name, time in self.marks:
+            lines.append(
+                f"  {(time - self.start) * 1000:8.1f} ms"
+                f" (+{(time - last) * 1000:7.1f} ms) {name}"
+            )
+            last = time
+        return "\n".join(lines)
+
+
 def property_animation(
     app: QApplication,
     target_object: QObject,
@@ -0,0 +1,155 @@
+"""
+Smoothing for noisy signals, updated in place with every decoded value so nothing is
+allocated per sample, and the per signal filter stage between decoding and the UI.
+"""
+
+from array import array
+from bisect import bisect_left, insort
+from math import fsum
+from time import perf_counter
+from typing import Any, Optional
+
+MEAN = "mean"
+EMA = "ema"
+MEDIAN = "median"
+MODES = (MEAN, EMA, MEDIAN)
+
+SIGNAL_FILTER_KEYS = {"mean", "median", "ema_alpha", "hysteresis", "max_rate_hz"}
+
+
+class SmoothingFilter:
+    """
+    Smooths a signal over its last `size` values, starting from a window filled with
+    `initial`. Modes:
+
+    - `mean`: the window average, kept as a running sum over a ring buffer, so an
+      update costs the same for any window size
+    - `ema`: exponential moving average giving new values the weight `alpha`, by
+      default `2 / (size + 1)`, which follows changes about as fast as `mean`
+    - `median`: the window median, from a sorted copy of the window, which ignores
+      spikes shorter than half the window
+    """
+
+    def __init__(
+        self,
+        size: int,
+        initial: float = 0.0,
+        mode: str = MEAN,
+        alpha: Optional[float] = None,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown smoothing mode: {mode}")
+        if size < 1:
+            raise ValueError("Smoothing window must hold at least one value")
+
+        self.size = size
+        self.mode = mode
+        self.alpha = 2 / (size + 1) if alpha is None else alpha
+        self.window = array("d", [initial]) * size
+        self.sorted_window = array("d", self.window)
+        self.index = 0
+        self.total = fsum(self.window)
+        self.value = float(initial)
+
+    def reset(self, val: float) -> None:
+        """Fills the window with `val`."""
+        for i in range(self.size):
+            self.window[i] = val
+            self.sorted_window[i] = val
+        self.index = 0
+        self.total = fsum(self.window)
+        self.value = float(val)
+
+    def update(self, val: float) -> float:
+        """Adds `val` to the window and returns the smoothed value."""
+        if self.mode == EMA:
+            self.value += self.alpha * (val - self.value)
+            return self.value
+
+        window = self.window
+        index = self.index
+        old = window[index]
+        window[index] = val
+        index += 1
+        if index == self.size:
+            index = 0
+        self.index = index
+
+        if self.mode == MEAN:
+            if index:
+                self.total += val - old
+            else:
+                # summed again once per lap, so rounding errors do not accumulate
+                self.total = fsum(window)
+            self.value = self.total / self.size
+            return self.value
+
+        sorted_window = self.sorted_window
+        del sorted_window[bisect_left(sorted_window, old)]
+        insort(sorted_window, val)
+        middle = self.size // 2
+        if self.size & 1:
+            self.value = sorted_window[middle]
+        else:
+            self.value = (sorted_window[middle - 1] + sorted_window[middle]) / 2
+        return self.value
+
+
+class SignalFilter:
+    """
+    The filter stage of one signal, configured by its table in `[signal_filters]` of
+    `config/can.toml`. Values go through a mean over `mean` values, a median over
+    `median` values, then an EMA with weight `ema_alpha`. The result is held back when it is within `hysteresis`
+    of the last value sent to the UI, or less than `1 / max_rate_hz` seconds after
+    it. CAN signals are sent periodically, so a held back change is sent with a later
+    value of the signal.
+    """
+
+    def __init__(self, name: str, settings: dict[str, Any]) -> None:
+        if unknown := settings.keys() - SIGNAL_FILTER_KEYS:
+            raise ValueError(
+                f"Unknown signal filter keys for {name}: {', '.join(sorted(unknown))}"
+            )
+
+        smoothing = []
+        if "mean" in settings:
+            smoothing.append(SmoothingFilter(settings["mean"], mode=MEAN))
+        if "median" in settings:
+            smoothing.append(SmoothingFilter(settings["median"], mode=MEDIAN))
+        if "ema_alpha" in settings:
+            smoothing.append(SmoothingFilter(1, mode=EMA, alpha=settings["ema_alpha"]))
+        self.smoothing = tuple(smoothing)
+
+        self.hysteresis = settings.get("hysteresis", 0)
+        max_rate_hz = settings.get("max_rate_hz")
+        self.min_interval = 1 / max_rate_hz if max_rate_hz else 0
+        self.sent: Optional[float] = None
+        self.sent_time = 0.0
+
+    def seed(self, val: float) -> None:
+        """Starts smoothing from `val`, like a value saved by the last run, instead of
+        from the first value."""
+        for smoothing in self.smoothing:
+            smoothing.reset(val)
+        self.sent = val
+
+    def update(self, val: float) -> Optional[float]:
+        """The value to send to the UI for `val`, or `None` to hold it back."""
+        if self.sent is None:
+            # smoothing starts from the first value instead of from zero
+            for smoothing in self.smoothing:
+                smoothing.reset(val)
+        else:
+            for smoothing in self.smoothing:
+                val = smoothing.update(val)
+            if abs(val - self.sent) < self.hysteresis:
+                return None
+
+        if self.min_interval:
+            now = perf_counter()
+            if self.sent is not None and now - self.sent_time < self.min_interval:
+                return None
+            self.sent_time = now
+
+        self.sent = val
+        return val
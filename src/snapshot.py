@@ -0,0 +1,130 @@
+"""
+Shares decoded values between the CAN thread and the GUI thread without locks or per
+value events, as an alternative to `CanHandler`'s Qt signals.
+"""
+
+from dataclasses import fields
+from typing import Any, Iterable, Optional
+from data import CarData
+
+
+class SignalSnapshot:
+    """
+    Two preallocated buffers with one slot per signal. The CAN thread writes into the
+    back buffer and `publish` makes it the front buffer by incrementing `sequence`
+    (the front buffer is `sequence & 1`), then copies the new values into the other
+    buffer so it is complete for the next writes.
+
+    The GUI thread reads the front buffer. The writer only touches that buffer after
+    `sequence` has moved on, so a read during which `sequence` is unchanged is a
+    complete snapshot; otherwise it is retried (a seqlock). Each slot records the
+    sequence that published it, so a reader gets exactly the values changed since the
+    sequence it last read.
+    """
+
+    def __init__(self, names: Optional[Iterable[str]] = None) -> None:
+        defaults = CarData()
+        self.names = tuple(names or (x.name for x in fields(CarData)))
+        self.index = {name: i for i, name in enumerate(self.names)}
+        num_slots = len(self.names)
+        values = [getattr(defaults, x, None) for x in self.names]
+
+        self.buffers = (list(values), list(values))
+        self.versions = ([0] * num_slots, [0] * num_slots)
+        self.timestamps = ([0.0] * num_slots, [0.0] * num_slots)
+        self.sequence = 0
+        self.dirty = [0] * num_slots
+        self.num_dirty = 0
+
+        # written by the CAN thread, the timestamp of the frame being decoded
+        self.frame_timestamp = 0.0
+        self.num_writes = 0
+        # written by the GUI thread
+        self.read_timestamp: Optional[float] = None
+        self.num_reads = 0
+        self.num_retries = 0
+        self.num_changed = 0
+        self.last_read_writes = 0
+        self.max_writes_per_read = 0
+        self.last_read_sequence = 0
+        self.max_published_per_read = 0
+
+    def write(self, name: str, val: Any) -> None:
+        """Stores `val` in the back buffer. Visible to readers after `publish`."""
+        i = self.index[name]
+        next_sequence = self.sequence + 1
+        back = next_sequence & 1
+        versions = self.versions[back]
+
+        if versions[i] != next_sequence:
+            versions[i] = next_sequence
+            self.dirty[self.num_dirty] = i
+            self.num_dirty += 1
+
+        self.buffers[back][i] = val
+        self.timestamps[back][i] = self.frame_timestamp
+        self.num_writes += 1
+
+    def publish(self) -> None:
+        """Swaps the buffers if anything was written since the last call."""
+        if not self.num_dirty:
+            return
+
+        self.sequence += 1
+        front = self.sequence & 1
+        back = front ^ 1
+        front_values, back_values = self.buffers[front], self.buffers[back]
+        front_versions, back_versions = self.versions[front], self.versions[back]
+        front_timestamps, back_timestamps = (
+            self.timestamps[front],
+            self.timestamps[back],
+        )
+
+        for k in range(self.num_dirty):
+            i = self.dirty[k]
+            back_values[i] = front_values[i]
+            back_versions[i] = front_versions[i]
+            back_timestamps[i] = front_timestamps[i]
+        self.num_dirty = 0
+
+    def read(self, since: int) -> tuple[int, dict[str, Any]]:
+        """Returns the current sequence and every value published after `since`.
+        `read_timestamp` is then the oldest frame timestamp among those values."""
+        names = self.names
+
+        while True:
+            sequence = self.sequence
+            front = sequence & 1
+            values, versions = self.buffers[front], self.versions[front]
+            changed_slots = [i for i, x in enumerate(versions) if x > since]
+            changed = {names[i]: values[i] for i in changed_slots}
+            timestamps = [self.timestamps[front][i] for i in changed_slots]
+            if self.sequence == sequence:
+                break
+            self.num_retries += 1
+
+        self.read_timestamp = min(timestamps, default=None)
+
+        num_writes = self.num_writes
+        writes = num_writes - self.last_read_writes
+        published = sequence - self.last_read_sequence
+        self.last_read_writes = num_writes
+        self.last_read_sequence = sequence
+        self.num_reads += 1
+        self.num_changed += len(changed)
+        self.max_writes_per_read = max(self.max_writes_per_read, writes)
+        self.max_published_per_read = max(self.max_published_per_read, published)
+
+        return sequence, changed
+
+    def report(self) -> str:
+        reads = max(self.num_reads, 1)
+        return (
+            f"[Info] Snapshot: {self.num_reads} reads of {self.sequence} published."
+            f" Per read: {self.last_read_writes / reads:.1f} writes"
+            f" (max {self.max_writes_per_read}),"
+            f" {self.last_read_sequence / reads:.1f} snapshots"
+            f" (max {self.max_published_per_read}),"
+            f" {self.num_changed / reads:.1f} changed values."
+            f" {self.num_retries} torn reads retried"
+        )
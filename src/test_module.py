@@ -1,4 +1,4 @@
-import can_handler
+import can_decoder
 import can
 from random import choice, randrange
 
@@ -13,7 +13,7 @@ turn_signal_data = [
 
 
 def provide_random_message() -> can.message.Message:
-    key, val = choice(list(can_handler.CAN_IDS.items()))
+    key, val = choice(list(can_decoder.CAN_IDS.items()))
     data = [0, 0, 0, 0, 0, 0, 0, 0]
 
     match key:
@@ -108,32 +108,50 @@ def provide_random_message() -> can.message.Message:
 
 
 def get_response_data(pid) -> list:
-    for i, v in can_handler.CURRENT_DATA_DEFINITION_ITEMS:
+    for i, v in can_decoder.CURRENT_DATA_DEFINITION_ITEMS:
         if v["pid"] == pid:
-            if i == "engine_load":
-                return [randrange(0, 256)]
-            elif i == "intake_manifold_absolute_pressure":
-                return [randrange(0, 256)]
-        return []
+            return [randrange(0, 256) for _ in range(v["response_length"])]
+    return []
+
+
+# consecutive frames of the last multi-frame response, sent on flow control
+pending_consecutive_frames: list[can.message.Message] = []
+
+
+def response_frames(payload: list) -> list[list]:
+    """ISO-TP frames carrying `payload`"""
+    if len(payload) <= 7:
+        return [[len(payload), *payload]]
+
+    frames = [[0x10 | len(payload) >> 8, len(payload) & 0xFF, *payload[:6]]]
+    for sequence, i in enumerate(range(6, len(payload), 7), 1):
+        frames.append([0x20 | sequence & 0x0F, *payload[i : i + 7]])
+    return [x + [0x55] * (8 - len(x)) for x in frames]
 
 
 def provide_response_message(
     recv_msg: can.message.Message,
-) -> can.message.Message | list[can.message.Message]:
-    if recv_msg.arbitration_id == can_handler.CONVERSATION_IDS["send_id"]:
-        data = recv_msg.data
+) -> list[can.message.Message]:
+    if recv_msg.arbitration_id != can_decoder.CONVERSATION_IDS["send_id"]:
+        return []
 
-        response_data = get_response_data(data[2])
+    data = recv_msg.data
+    if data[0] >> 4 == 0x3:  # flow control
+        frames = list(pending_consecutive_frames)
+        pending_consecutive_frames.clear()
+        return frames
 
-        new_data = [0x55 for _ in range(8)]
-        new_data[0] = 0x03
-        new_data[1] = data[1] + 0x40
-        new_data[2] = data[2]
-        new_data[3 : 3 + len(response_data)] = response_data
-        new_data = new_data[:8]
+    response = [data[1] + 0x40]
+    for pid in data[2 : 1 + data[0]]:
+        response += [pid, *get_response_data(pid)]
 
-        return can.message.Message(
+    frames = [
+        can.message.Message(
             is_extended_id=False,
-            arbitration_id=can_handler.CONVERSATION_IDS["ecu_response_id"],
-            data=new_data,
+            arbitration_id=can_decoder.CONVERSATION_IDS["ecu_response_id"],
+            data=x,
         )
+        for x in response_frames(response)
+    ]
+    pending_consecutive_frames[:] = frames[1:]
+    return frames[:1]